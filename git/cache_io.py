@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# 缓存文件格式：3 字节魔数 + 1 字节版本号 + zlib 压缩的紧凑 JSON。
+# 没有魔数的文件按旧版的纯 JSON 读取，由调用方重新写成新格式
+MAGIC = b'GHC'
+VERSION = 1
+EXTENSION = '.cache'
+
+
+def dumps(obj):
+    payload = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return MAGIC + bytes([VERSION]) + zlib.compress(payload, 6)
+
+
+def loads(data):
+    # 返回 (对象, 是否为旧格式)
+    if data[:len(MAGIC)] == MAGIC:
+        version = data[len(MAGIC)]
+        if version != VERSION:
+            raise ValueError(f"不支持的缓存版本: {version}")
+        return json.loads(zlib.decompress(data[len(MAGIC) + 1:]).decode('utf-8')), False
+    return json.loads(data.decode('utf-8')), True
+
+
+def write_atomic(path, obj):
+    # 先写临时文件再原子替换，写到一半崩溃也不会留下截断的缓存
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(dumps(obj))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+class CacheWriter:
+    # 单个后台线程按提交顺序执行所有缓存写入，同一文件尚未写出的旧内容直接被新内容替换
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-writer')
+        self.lock = threading.Lock()
+        # 内容写到磁盘之前一直留在 pending 中，读取时优先返回
+        self.pending = {}
+        self.scheduled = set()
+
+    def write(self, path, obj):
+        with self.lock:
+            self.pending[path] = obj
+            if path in self.scheduled:
+                return
+            self.scheduled.add(path)
+        self.executor.submit(self._write_pending, path)
+
+    def _write_pending(self, path):
+        with self.lock:
+            self.scheduled.discard(path)
+            if path not in self.pending:
+                return
+            obj = self.pending[path]
+        try:
+            write_atomic(path, obj)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"写入缓存 {path} 失败: {str(e)}")
+        with self.lock:
+            if self.pending.get(path) is obj:
+                del self.pending[path]
+
+    def read(self, path):
+        # 优先返回还没写到磁盘的内容
+        with self.lock:
+            if path in self.pending:
+                return self.pending[path], False
+        return read(path)
+
+    def exists(self, path):
+        with self.lock:
+            if path in self.pending:
+                return True
+        return os.path.exists(path)
+
+    def remove(self, path):
+        with self.lock:
+            self.pending.pop(path, None)
+        self.executor.submit(self._remove, path)
+
+    @staticmethod
+    def _remove(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def call(self, fn, *args):
+        # 在写入线程中执行其他持久化操作，例如数据库写入
+        def run():
+            try:
+                return fn(*args)
+            except Exception as e:
+                print(f"后台写入缓存失败: {str(e)}")
+        return self.executor.submit(run)
+
+    def flush(self, timeout=None):
+        # 只有一个工作线程，这个空任务完成时之前提交的写入都已完成
+        self.executor.submit(lambda: None).result(timeout)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
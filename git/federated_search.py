@@ -0,0 +1,149 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6 import QtCore
+from .search_widget import compile_query, run_query
+from .github_search import GitHubSearchWidget
+
+# 结果来源，数字越小越优先：同一个仓库出现在多个来源中时只保留最优先的一个
+SOURCE_ORDER = {'repos': 0, 'starred': 1, 'github': 2}
+SOURCE_LABELS = {'repos': '我的仓库', 'starred': '星标', 'github': 'GitHub'}
+
+# 每个本地列表最多取多少个结果，精确匹配排在前面
+MAX_LOCAL_RESULTS = 100
+
+
+def rank_key(repo, source, text):
+    # 名称完全相同 > 名称以查询开头 > 名称包含查询 > 描述包含查询 > 其他（GitHub 在 README 等处匹配到的）；
+    # 同一档中本地结果优先，再按星标数排序
+    name = (repo['name'] or '').lower()
+    full_name = (repo['full_name'] or '').lower()
+    if not text:
+        match = 4
+    elif name == text or full_name == text:
+        match = 0
+    elif name.startswith(text):
+        match = 1
+    elif text in name or text in full_name:
+        match = 2
+    elif text in (repo['description'] or '').lower():
+        match = 3
+    else:
+        match = 4
+    return match, SOURCE_ORDER[source], -(repo['stargazers_count'] or 0)
+
+
+class FederatedSearch(QtCore.QObject):
+    # 主页的统一搜索入口：自己的仓库和星标仓库在搜索线程中通过本地索引立即查询，
+    # GitHub 搜索的结果每到一批就合并进同一个列表，按 id 去重后重新排序。
+    # results_updated 发出 (编号, [(仓库, 来源), ...], 是否全部完成)
+    results_updated = QtCore.pyqtSignal(int, list, bool)
+    local_ready = QtCore.pyqtSignal(int, list)
+
+    def __init__(self, preloader, client, parent=None):
+        super().__init__(parent)
+        self.preloader = preloader
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='federated-search')
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.future = None
+        self.rank_text = ''
+        self.entries = {}
+        self.pending = set()
+        self.remote_search = None
+        self.local_ready.connect(self.on_local_ready)
+
+    def search(self, search_text, username=None, token=None):
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            if self.future is not None:
+                self.future.cancel()
+        # 上一次的 GitHub 搜索还没结束时停止它，剩下的子查询不再发出
+        if self.remote_search is not None:
+            self.remote_search.cancel()
+            self.remote_search = None
+        # lang:、stars: 等限定条件只用于本地过滤，GitHub 搜索只使用其中的普通文本
+        remote_text = compile_query(search_text).text.strip()
+        self.rank_text = remote_text.lower()
+        self.entries = {}
+        self.pending = {'local', 'remote'} if remote_text else {'local'}
+
+        sources = []
+        if username:
+            sources.append(('repos', self.preloader.get_preloaded_repos(username)))
+            sources.append(('starred', self.preloader.get_preloaded_starred_repos(username)))
+        with self.lock:
+            self.future = self.executor.submit(self.search_local, generation, sources, search_text)
+        if not remote_text:
+            return generation
+
+        # 先连接信号再发起请求，第一批结果不会丢失
+        remote_search = GitHubSearchWidget(client=self.client, search_cache=self.preloader.search_cache,
+                                           token=token)
+        remote_search.results_batch.connect(lambda items: self.on_remote_batch(generation, items))
+        remote_search.search_completed.connect(lambda items: self.on_remote_completed(generation, items))
+        # 保留引用，避免搜索完成前组件被回收
+        self.remote_search = remote_search
+        remote_search.search_input.setText(remote_text)
+        remote_search.perform_search()
+        return generation
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def search_local(self, generation, sources, search_text):
+        if not self.is_current(generation):
+            return
+        entries = []
+        try:
+            for source, repos in sources:
+                results, _ = run_query(repos, search_text, '全部')
+                entries.extend((repo, source) for repo in results[:MAX_LOCAL_RESULTS])
+        except Exception as e:
+            print(f"本地搜索 {search_text} 时发生错误: {str(e)}")
+        if self.is_current(generation):
+            self.local_ready.emit(generation, entries)
+
+    @QtCore.pyqtSlot(int, list)
+    def on_local_ready(self, generation, entries):
+        if self.is_current(generation):
+            self.merge(entries, 'local')
+
+    def on_remote_batch(self, generation, items):
+        if self.is_current(generation):
+            self.merge([(repo, 'github') for repo in items])
+
+    def on_remote_completed(self, generation, items):
+        if self.is_current(generation):
+            self.merge([(repo, 'github') for repo in items], 'remote')
+
+    def merge(self, entries, finished_part=None):
+        for repo, source in entries:
+            existing = self.entries.get(repo['id'])
+            if existing is not None and SOURCE_ORDER[existing[1]] <= SOURCE_ORDER[source]:
+                continue
+            self.entries[repo['id']] = (repo, source)
+        self.pending.discard(finished_part)
+        self.publish()
+
+    def publish(self):
+        text = self.rank_text
+        ranked = sorted(self.entries.values(), key=lambda entry: rank_key(entry[0], entry[1], text))
+        self.results_updated.emit(self.generation, ranked, not self.pending)
+
+    def split_results(self):
+        # 按本地和 GitHub 分开，供结果对话框分页显示
+        ranked = sorted(self.entries.values(), key=lambda entry: rank_key(entry[0], entry[1], self.rank_text))
+        local_results = [repo for repo, source in ranked if source != 'github']
+        github_results = [repo for repo, source in ranked if source == 'github']
+        return local_results, github_results
+
+    def shutdown(self):
+        with self.lock:
+            self.generation += 1
+            if self.future is not None:
+                self.future.cancel()
+        if self.remote_search is not None:
+            self.remote_search.cancel()
+        self.executor.shutdown(wait=False)
@@ -1,17 +1,22 @@
-import asyncio
-import aiohttp
 from PyQt6 import QtWidgets, QtCore, QtGui
 from datetime import datetime
-import re
-import requests
 from bs4 import BeautifulSoup
 from git.search_widget import SearchWidget
+from git import highlighter
 
 class GitHubSearchWidget(QtWidgets.QWidget):
     search_completed = QtCore.pyqtSignal(list)
+    # 每个子查询返回后立即发出这一批结果，search_completed 仍然在最后发出完整的结果
+    results_batch = QtCore.pyqtSignal(list)
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, client=None, search_cache=None, token=None):
         super().__init__(parent)
+        self.client = client
+        # 带上登录的 token，搜索接口每分钟 30 次；匿名搜索只有 10 次
+        self.token = token
+        self.search_cache = search_cache
+        # 正在进行的搜索，开始新的搜索或取消时停止它，不再占用搜索额度
+        self.future = None
         self.init_ui()
 
     def init_ui(self):
@@ -27,19 +32,34 @@ class GitHubSearchWidget(QtWidgets.QWidget):
     def perform_search(self):
         search_text = self.search_input.text()
         if search_text:
-            asyncio.get_event_loop().call_soon_threadsafe(
-                lambda: asyncio.create_task(self.search_github(search_text))
-            )
+            self.cancel()
+            self.future = self.client.submit(self.search_github(search_text))
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
 
     async def search_github(self, search_text):
-        async with aiohttp.ClientSession() as session:
-            exact_matches = await self.search_exact(session, search_text)
-            partial_matches = await self.search_partial(session, search_text)
-            
-            all_results = self.remove_duplicates(exact_matches + partial_matches)
-            sorted_results = self.sort_results(all_results)
-            
-            self.search_completed.emit(sorted_results)
+        # 有效期内搜索过的查询直接返回缓存的结果，不占用搜索额度
+        if self.search_cache is not None:
+            cached = self.search_cache.get(search_text)
+            if cached is not None:
+                print(f"使用缓存的搜索结果: {search_text}")
+                self.search_completed.emit(cached)
+                return
+
+        session = self.client
+        exact_matches, exact_complete = await self.search_exact(session, search_text)
+        partial_matches, partial_complete = await self.search_partial(session, search_text)
+        
+        all_results = self.remove_duplicates(exact_matches + partial_matches)
+        sorted_results = self.sort_results(all_results)
+        # 有请求失败（通常是被限流）时结果不完整，不写入缓存
+        if self.search_cache is not None and exact_complete and partial_complete:
+            sorted_results = self.search_cache.put(search_text, sorted_results)
+        
+        self.search_completed.emit(sorted_results)
 
     async def search_exact(self, session, search_text):
         queries = [
@@ -50,23 +70,33 @@ class GitHubSearchWidget(QtWidgets.QWidget):
             f'"{search_text}" in:readme'
         ]
         results = []
+        complete = True
         for query in queries:
-            results.extend(await self.fetch_results(session, query))
-        return results
+            items = await self.fetch_results(session, query)
+            if items is None:
+                complete = False
+                continue
+            results.extend(items)
+            if items:
+                self.results_batch.emit(items)
+        return results, complete
 
     async def search_partial(self, session, search_text):
         query = f'{search_text} in:name,description,readme'
-        return await self.fetch_results(session, query)
+        items = await self.fetch_results(session, query)
+        if items:
+            self.results_batch.emit(items)
+        return items or [], items is not None
 
     async def fetch_results(self, session, query):
         url = f"https://api.github.com/search/repositories?q={query}&sort=stars&order=desc"
-        async with session.get(url) as response:
+        async with session.get(url, token=self.token) as response:
             if response.status == 200:
                 data = await response.json()
                 return data['items']
             else:
                 print(f"GitHub 搜索失败: {response.status}")
-                return []
+                return None
 
     def remove_duplicates(self, repos):
         seen = set()
@@ -116,32 +146,29 @@ def create_repo_widget(repo, search_text):
     return widget
 
 def highlight_text(text, search_text):
-    if not text or not search_text:
-        return text
-    highlighted_text = re.sub(
-        f'({re.escape(search_text)})',
-        r'<span style="background-color: yellow;">\1</span>',
-        text,
-        flags=re.IGNORECASE
-    )
-    return highlighted_text
-
-def search_github(search_text, callback):
-    search_widget = GitHubSearchWidget()
+    # 与本地列表共用同一套高亮，正则按查询缓存
+    return highlighter.highlight_text(text, search_text)
+
+def search_github(search_text, callback, client, search_cache=None, token=None):
+    search_widget = GitHubSearchWidget(client=client, search_cache=search_cache, token=token)
     search_widget.search_completed.connect(callback)
     search_widget.search_input.setText(search_text)
     search_widget.perform_search()
+    return search_widget
 
 def show_github_search_dialog(parent):
     dialog = GitHubSearchDialog(parent)
     dialog.exec()
 
-def github_search(query, token):
+async def github_search(client, query, token):
     url = "https://api.github.com/search/repositories"
-    headers = {"Authorization": f"token {token}"}
     params = {"q": query}
-    response = requests.get(url, headers=headers, params=params)
-    # ...
+    async with client.get(url, token=token, params=params) as response:
+        if response.status == 200:
+            data = await response.json()
+            return data['items']
+        print(f"GitHub 搜索失败: {response.status}")
+        return []
 
 class GitHubSearchDialog(QtWidgets.QDialog):
     def __init__(self, parent=None, token=None):
@@ -0,0 +1,48 @@
+import functools
+import re
+from collections import OrderedDict
+
+HIGHLIGHT_TEMPLATE = r'<span style="background-color: yellow; color: black;">\g<0></span>'
+
+
+@functools.lru_cache(maxsize=64)
+def compile_pattern(search_text):
+    # 同一个查询的正则只编译一次
+    return re.compile(re.escape(search_text), re.IGNORECASE)
+
+
+def highlight_text(text, search_text):
+    if not text or not search_text:
+        return text
+    highlighted_text = compile_pattern(search_text).sub(HIGHLIGHT_TEMPLATE, text)
+    return f'<span style="color: black;">{highlighted_text}</span>'
+
+
+class Highlighter:
+    # 列表视图共用的高亮：记住当前查询，每行每个字段生成的标记按 (仓库 id, 字段) 缓存，
+    # 查询不变时重建控件或来回滚动都不再重新替换；查询变化时清空缓存
+    def __init__(self, max_entries=2000):
+        self.query = ''
+        self.max_entries = max_entries
+        self.markups = OrderedDict()
+
+    def set_query(self, search_text):
+        search_text = search_text or ''
+        if search_text != self.query:
+            self.query = search_text
+            self.markups.clear()
+
+    def markup(self, repo_id, field, text):
+        if not text or not self.query:
+            return text
+        key = (repo_id, field)
+        entry = self.markups.get(key)
+        # 同一个仓库的字段内容可能已经更新，内容不同时重新生成
+        if entry is not None and entry[0] == text:
+            self.markups.move_to_end(key)
+            return entry[1]
+        result = highlight_text(text, self.query)
+        self.markups[key] = (text, result)
+        while len(self.markups) > self.max_entries:
+            self.markups.popitem(last=False)
+        return result
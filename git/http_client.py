@@ -0,0 +1,94 @@
+import asyncio
+import aiohttp
+from contextlib import asynccontextmanager
+from .rate_limiter import RateLimitScheduler
+
+
+class GitHubClient:
+    # 所有标签页共用的长连接客户端，运行在 MainWindow 的事件循环线程中
+    def __init__(self, loop=None, limit=32, limit_per_host=16, dns_cache_ttl=600, keepalive_timeout=60):
+        self.loop = loop
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self._auth_headers = {}
+        self.scheduler = RateLimitScheduler()
+
+    def get_session(self):
+        # aiohttp 的会话必须在运行中的事件循环里创建，所以延迟到第一次请求时
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+                enable_cleanup_closed=True
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                # 不限制总时间：仓库压缩包下载和上传可能持续很久；
+                # 只限制建立连接和两次读取之间的间隔，卡住的请求仍会超时
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60),
+                headers={'Accept': 'application/vnd.github+json'}
+            )
+        return self.session
+
+    def auth_headers(self, token):
+        if not token:
+            return {}
+        if token not in self._auth_headers:
+            self._auth_headers[token] = {'Authorization': f'token {token}'}
+        return self._auth_headers[token]
+
+    def forget_token(self, token):
+        self._auth_headers.pop(token, None)
+
+    @asynccontextmanager
+    async def request(self, method, url, token=None, headers=None, priority=RateLimitScheduler.INTERACTIVE, **kwargs):
+        merged_headers = dict(self.auth_headers(token))
+        if headers:
+            merged_headers.update(headers)
+        # 先向调度器申请这个 token 的额度，响应返回后用其中的限流头更新剩余额度
+        resource = self.scheduler.resource_for(url)
+        key = merged_headers.get('Authorization')
+        await self.scheduler.acquire(resource, priority, key)
+        try:
+            async with self.get_session().request(method, url, headers=merged_headers, **kwargs) as response:
+                self.scheduler.update(resource, response.status, response.headers, key)
+                yield response
+        finally:
+            self.scheduler.release(resource, key)
+
+    def budget(self, token, resource):
+        return self.scheduler.bucket(resource, self.auth_headers(token).get('Authorization'))
+
+    def get(self, url, token=None, headers=None, **kwargs):
+        return self.request('GET', url, token, headers, **kwargs)
+
+    def post(self, url, token=None, headers=None, **kwargs):
+        return self.request('POST', url, token, headers, **kwargs)
+
+    def put(self, url, token=None, headers=None, **kwargs):
+        return self.request('PUT', url, token, headers, **kwargs)
+
+    def delete(self, url, token=None, headers=None, **kwargs):
+        return self.request('DELETE', url, token, headers, **kwargs)
+
+    def submit(self, coro):
+        # 从 Qt 线程把协程交给事件循环线程执行
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    def shutdown(self, timeout=5):
+        if self.loop is None or self.loop.is_closed() or not self.loop.is_running():
+            return
+        try:
+            self.submit(self.close()).result(timeout)
+        except Exception as e:
+            print(f"关闭 HTTP 客户端时发生错误: {str(e)}")
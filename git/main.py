@@ -12,12 +12,13 @@ from PyQt6 import QtWidgets, QtGui, QtCore
 from git.token_tab import TokenTab
 from git.repository_tab import RepositoryTab
 from git.search_widget import SearchWidget
-from git.github_search import GitHubSearchDialog, search_github, create_repo_widget
-import aiohttp
+from git.github_search import GitHubSearchDialog, create_repo_widget
 from datetime import datetime
 from git.log_tab import LogTab
 from git.preloader import Preloader
+from git.http_client import GitHubClient
 from git.starred_tab import StarredTab
+from git.federated_search import FederatedSearch, SOURCE_LABELS
 
 # 临时创建占位类
 class PlaceholderTab(QtWidgets.QWidget):
@@ -32,7 +33,9 @@ class HomeTab(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.search_generation = 0
         self.init_ui()
+        self.main_window.federated_search.results_updated.connect(self.display_search_results)
 
     def init_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
@@ -44,7 +47,7 @@ class HomeTab(QtWidgets.QWidget):
         
         # 创建并设置搜索框样式
         self.search_input = QtWidgets.QLineEdit()
-        self.search_input.setPlaceholderText("搜索 GitHub 仓库...")
+        self.search_input.setPlaceholderText("搜索我的仓库、星标和 GitHub...")
         self.search_input.setFixedHeight(40)  # 增加高度
         self.search_input.setStyleSheet("""
             QLineEdit {
@@ -130,7 +133,16 @@ class HomeTab(QtWidgets.QWidget):
         self.scroll_bottom_button.clicked.connect(self.scroll_to_bottom)
         self.scroll_bottom_button.setVisible(False)
 
+        # 按本地和 GitHub 分开查看当前结果
+        self.split_results_button = QtWidgets.QPushButton("⧉")
+        self.split_results_button.setFixedSize(30, 30)
+        self.split_results_button.setStyleSheet(self.scroll_top_button.styleSheet())
+        self.split_results_button.setToolTip("分开查看本地和 GitHub 结果")
+        self.split_results_button.clicked.connect(self.show_split_results)
+        self.split_results_button.setVisible(False)
+
         scroll_buttons_layout.addWidget(self.scroll_top_button)
+        scroll_buttons_layout.addWidget(self.split_results_button)
         scroll_buttons_layout.addStretch()
         scroll_buttons_layout.addWidget(self.scroll_bottom_button)
 
@@ -186,24 +198,38 @@ class HomeTab(QtWidgets.QWidget):
             self.search_results_scroll.setVisible(True)
             self.scroll_top_button.setVisible(True)
             self.scroll_bottom_button.setVisible(True)
-            self.search_github_repos(search_text)
+            self.search_repos(search_text)
         else:
+            self.search_generation = 0
             self.welcome_widget.setVisible(True)
             self.search_results_scroll.setVisible(False)
             self.scroll_top_button.setVisible(False)
             self.scroll_bottom_button.setVisible(False)
+            self.split_results_button.setVisible(False)
 
-    def search_github_repos(self, search_text):
+    def search_repos(self, search_text):
+        # 本地列表的结果几乎立即显示，GitHub 的结果到达后合并进同一个列表
+        self.clear_search_results()
+        username = self.main_window.token_tab.current_username
+        token = self.main_window.token_tab.current_token
+        self.search_generation = self.main_window.federated_search.search(search_text, username, token)
+
+    @QtCore.pyqtSlot(int, list, bool)
+    def display_search_results(self, generation, entries, finished):
+        if generation != self.search_generation:
+            return
+        # 每批结果到达后整体重新排序，列表不长，直接重建
         self.clear_search_results()
-        search_github(search_text, self.display_github_results)
+        for repo, source in entries:
+            self.search_results_layout.addWidget(self.create_repo_widget(repo, source != 'github', source))
+        self.scroll_top_button.setVisible(True)
+        self.scroll_bottom_button.setVisible(True)
+        self.split_results_button.setVisible(finished and bool(entries))
+        if finished:
+            self.main_window.log_message(f"搜索完成，共 {len(entries)} 个结果")
 
-    @QtCore.pyqtSlot(list)
-    def display_github_results(self, repos):
-        for repo in repos:
-            result_widget = self.create_repo_widget(repo, False)  # 修改这里，传 False 表示不是本地仓库
-            self.search_results_layout.addWidget(result_widget)
-        self.search_results_scroll.setVisible(True)
-        self.welcome_widget.setVisible(False)
+    def show_split_results(self):
+        self.main_window.show_search_results(*self.main_window.federated_search.split_results())
 
     def add_search_result(self, repo, is_local):
         result_widget = self.create_repo_widget(repo, is_local)
@@ -217,7 +243,7 @@ class HomeTab(QtWidgets.QWidget):
         self.scroll_top_button.setVisible(False)
         self.scroll_bottom_button.setVisible(False)
 
-    def create_repo_widget(self, repo, is_local):
+    def create_repo_widget(self, repo, is_local, source=None):
         widget = QtWidgets.QWidget()
         layout = QtWidgets.QVBoxLayout(widget)
         layout.setContentsMargins(15, 10, 15, 10)
@@ -253,7 +279,12 @@ class HomeTab(QtWidgets.QWidget):
             language_label.setStyleSheet("font-size: 12px; color: #586069;")
             stats_layout.addWidget(language_label)
         
-        updated_label = QtWidgets.QLabel(f"Updated on {repo['updated_at'][:10]}")
+        if is_local and source in SOURCE_LABELS:
+            source_label = QtWidgets.QLabel(SOURCE_LABELS[source])
+            source_label.setStyleSheet("font-size: 12px; color: #2ecc71;")
+            stats_layout.addWidget(source_label)
+        
+        updated_label = QtWidgets.QLabel(f"Updated on {(repo['updated_at'] or '')[:10]}")
         updated_label.setStyleSheet("font-size: 12px; color: #586069;")
         stats_layout.addWidget(updated_label)
         
@@ -303,16 +334,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tab_widget = QtWidgets.QTabWidget()
         self.main_layout.addWidget(self.tab_widget)
         
+        # 创建并启动事件循环线程，所有网络请求都在这个循环中执行
+        self.loop = asyncio.new_event_loop()
+        self.event_loop_thread = QtCore.QThread()
+        self.event_loop_thread.run = self.run_event_loop
+        self.event_loop_thread.start()
+
+        # 所有标签页共用同一个 HTTP 客户端
+        self.http_client = GitHubClient(self.loop)
+
         # 创建 Preloader 实例
-        self.preloader = Preloader()
+        self.preloader = Preloader(self.http_client)
         self.preloader.preload_completed.connect(self.on_preload_completed)
         self.preloader.preload_progress.connect(self.on_preload_progress)
         self.preloader.summary_completed.connect(self.on_summary_completed)
-        
-        # 创建并启动事件循环线程
-        self.event_loop_thread = QtCore.QThread()
-        self.event_loop_thread.run = self.run_event_loop
-        self.event_loop_thread.start()
+
+        # 主页的统一搜索，同时查询本地列表和 GitHub
+        self.federated_search = FederatedSearch(self.preloader, self.http_client, self)
         
         # 初始化所有标签页
         self.home_tab = HomeTab(self)
@@ -336,6 +374,12 @@ class MainWindow(QtWidgets.QMainWindow):
         # 添加登录状态标签到状态栏
         self.login_status_label = QtWidgets.QLabel("未登录")
         self.statusBar.addPermanentWidget(self.login_status_label)
+
+        # 显示各类接口剩余的 API 额度
+        self.rate_limits = {}
+        self.rate_limit_label = QtWidgets.QLabel("")
+        self.statusBar.addPermanentWidget(self.rate_limit_label)
+        self.http_client.scheduler.rate_limit_updated.connect(self.on_rate_limit_updated)
         
         # 设置样式
         self.set_styles()
@@ -345,7 +389,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.token_tab.login_status_updated.connect(self.on_login_status_updated)
         self.token_tab.username_updated.connect(self.on_username_updated)
         self.token_tab.username_updated.connect(self.update_repository_username)
-        self.token_tab.token_updated.connect(self.starred_tab.refresh_starred_repos)
 
         # 尝试使用最后一个 token 登录
         QtCore.QTimer.singleShot(0, self.token_tab.try_login_with_last_token)
@@ -354,10 +397,6 @@ class MainWindow(QtWidgets.QMainWindow):
         self.data_dir = os.path.join(os.getcwd(), 'data')
         os.makedirs(self.data_dir, exist_ok=True)
 
-    def search_local_repos(self, search_text):
-        self.tab_widget.setCurrentIndex(1)  # 换到仓库标签页
-        self.repository_tab.filter_repos(search_text, "全")
-
     def search_github(self, search_text):
         dialog = GitHubSearchDialog(self)
         dialog.search_widget.search_input.setText(search_text)
@@ -453,11 +492,14 @@ class MainWindow(QtWidgets.QMainWindow):
             self.login_status_label.setText(f"已登录: {username}")
             self.repository_tab.current_username = username
             self.repository_tab.current_token = self.token_tab.current_token
+            # 先显示缓存；缓存过期时预加载在后台重新验证，新鲜时不访问网络
             self.repository_tab.load_cached_repos()
-            self.starred_tab.refresh_starred_repos()  # 添加这行
+            self.starred_tab.load_cached_repos()
             if self.token_tab.current_token:
                 QtCore.QTimer.singleShot(0, lambda: self.preloader.start_preload(self.token_tab.current_token, username))
+                self.preloader.start_auto_refresh(self.token_tab.current_token, username)
         else:
+            self.preloader.stop_auto_refresh()
             self.login_status_label.setText("未登录")
             self.repository_tab.current_username = None
             self.repository_tab.current_token = None
@@ -485,25 +527,41 @@ class MainWindow(QtWidgets.QMainWindow):
             print(f"Log message (log_tab not initialized): {message}")
 
     def on_preload_completed(self, repos):
-        self.repository_tab.load_cached_repos()
+        self.repository_tab.apply_repos(repos)
 
     def on_preload_progress(self, current, total):
         # 更新预加载进度
+        if total <= 0:
+            return
         progress = (current / total) * 100
         self.statusBar.showMessage(f"正在预加载仓库... {progress:.1f}%")
         if current == total:
             self.statusBar.showMessage("预加载完成", 3000)  # 显示3秒后消失
 
     def run_event_loop(self):
-        asyncio.set_event_loop(asyncio.new_event_loop())
-        loop = asyncio.get_event_loop()
-        self.preloader.loop = loop
-        loop.run_forever()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def changeEvent(self, event):
+        # 窗口最小化时降低后台刷新频率
+        if event.type() == QtCore.QEvent.Type.WindowStateChange and hasattr(self, 'preloader'):
+            self.preloader.set_window_visible(not self.isMinimized())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.preloader.set_window_visible(True)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.preloader.set_window_visible(False)
+        super().hideEvent(event)
 
     def closeEvent(self, event):
-        # 停止所有正在运行的异步任务
-        if hasattr(self, 'preloader') and self.preloader.loop:
-            self.preloader.loop.call_soon_threadsafe(self.preloader.loop.stop)
+        # 先在事件循环中关闭共享的 HTTP 客户端，再停止事件循环
+        if hasattr(self, 'http_client'):
+            self.http_client.shutdown()
+        if hasattr(self, 'loop') and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
 
         # 等待事件循环线程结束
         if hasattr(self, 'event_loop_thread'):
@@ -515,15 +573,30 @@ class MainWindow(QtWidgets.QMainWindow):
             self.event_loop_thread.terminate()
             self.event_loop_thread.wait()
 
-        # 关闭所有打开的会话
+        # 写入尚未保存的缓存修改，等写入线程完成后再关闭数据库
+        if hasattr(self, 'federated_search'):
+            self.federated_search.shutdown()
+        # 停止两个列表标签页的搜索线程，丢弃还没开始的搜索
+        for tab_name in ('repository_tab', 'starred_tab'):
+            if hasattr(self, tab_name):
+                getattr(self, tab_name).search_worker.shutdown()
         if hasattr(self, 'preloader'):
-            asyncio.run(self.close_all_sessions())
+            self.preloader.shutdown()
 
         super().closeEvent(event)
 
-    async def close_all_sessions(self):
-        if hasattr(self.preloader, 'session') and isinstance(self.preloader.session, aiohttp.ClientSession):
-            await self.preloader.session.close()
+    @QtCore.pyqtSlot(str, int, int, int)
+    def on_rate_limit_updated(self, resource, remaining, limit, reset_at):
+        self.rate_limits[resource] = (remaining, limit, reset_at)
+        parts = []
+        for name in ('core', 'search', 'graphql'):
+            if name in self.rate_limits:
+                name_remaining, name_limit, _ = self.rate_limits[name]
+                parts.append(f"{name} {name_remaining}/{name_limit}")
+        self.rate_limit_label.setText("API 额度: " + " | ".join(parts))
+        if remaining == 0 and reset_at:
+            reset_time = datetime.fromtimestamp(reset_at).strftime("%H:%M:%S")
+            self.statusBar.showMessage(f"{resource} 接口额度已用完，将在 {reset_time} 后继续", 5000)
 
     def on_summary_completed(self, summary):
         # 移除打印最常用仓库总结的代码
@@ -535,18 +608,7 @@ def main():
     window = MainWindow()
     window.show()
 
-    # 创建一个新的事件循环
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    def run_async_loop():
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-
-    # 在单独的线程中运行异步事件循环
-    import threading
-    threading.Thread(target=run_async_loop, daemon=True).start()
-
+    # 异步事件循环由 MainWindow 在单独的线程中运行
     # 运行 Qt 事件循环
     return app.exec()
 
@@ -1,87 +1,584 @@
 import asyncio
 import aiohttp
-import json
 import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
 from PyQt6 import QtCore
 from datetime import datetime, timedelta
+from . import cache_io
+from .validator_store import ValidatorStore
+from .search_cache import SearchCache
+from .write_behind import WriteBehind
+from .repo_store import RepoStore
+from .repo_record import RepoRecord, RecordPool, parse_time
+from .rate_limiter import RateLimitScheduler
+
+GRAPHQL_REPO_FRAGMENT = '''
+fragment RepoFields on Repository {
+  databaseId
+  name
+  nameWithOwner
+  description
+  url
+  primaryLanguage { name }
+  stargazerCount
+  forkCount
+  updatedAt
+  pushedAt
+  isFork
+  owner { login }
+}
+'''
+
+# 每个列表一条按游标分页的查询，只请求上面这些字段
+GRAPHQL_QUERIES = {
+    'repos': '''
+query($cursor: String, $perPage: Int!) {
+  viewer {
+    list: repositories(first: $perPage, after: $cursor,
+                       ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER],
+                       orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes { ...RepoFields }
+    }
+  }
+}
+''' + GRAPHQL_REPO_FRAGMENT,
+    'starred': '''
+query($cursor: String, $perPage: Int!) {
+  viewer {
+    list: starredRepositories(first: $perPage, after: $cursor,
+                              orderBy: {field: STARRED_AT, direction: DESC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes { ...RepoFields }
+    }
+  }
+}
+''' + GRAPHQL_REPO_FRAGMENT
+}
+
+class PreloadProgress:
+    # 以页为单位统计预加载进度，总页数在拿到每个列表的第一页后才确定
+    def __init__(self, signal):
+        self.signal = signal
+        self.done = 0
+        self.total = 0
+
+    def expect(self, pages):
+        self.total += pages
+
+    def page_done(self):
+        self.done += 1
+        self.signal.emit(self.done, self.total)
+
 
 class Preloader(QtCore.QObject):
     preload_completed = QtCore.pyqtSignal(list)
     preload_progress = QtCore.pyqtSignal(int, int)
     summary_completed = QtCore.pyqtSignal(list)
     starred_repos_loaded = QtCore.pyqtSignal(list)
+    # 完整加载时按页推送，第二个参数表示是否为本次加载的第一批
+    repos_batch_loaded = QtCore.pyqtSignal(list, bool)
+    starred_batch_loaded = QtCore.pyqtSignal(list, bool)
 
-    def __init__(self):
+    def __init__(self, client):
         super().__init__()
+        self.client = client
         self.repos = {}
         self.starred_repos = {}
         self.cache_dir = os.path.join(os.getcwd(), 'data', 'cache')
         os.makedirs(self.cache_dir, exist_ok=True)
-        self.loop = None
-        self.session = None
-
-    async def preload_repos(self, token, username):
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+        # 缓存写入统一放到一个后台线程中，按提交顺序执行
+        self.writer = cache_io.CacheWriter()
+        self.validator_store = ValidatorStore(self.cache_dir, self.writer)
+        self.store = RepoStore(self.cache_dir)
+        self.search_cache = SearchCache(self.cache_dir, self.writer)
+        # 所有账号的列表共用按仓库 id 去重的记录
+        self.pool = RecordPool()
+        self.loop = client.loop
+        # 列表的修改先合并，每隔几秒写入一次数据库
+        self.write_behind = WriteBehind(self.store, self.writer, self.loop, self.loaded_list)
+        # 两个列表都按最近变化倒序获取，增量同步只需要看最前面的几页
+        self.endpoints = {
+            'repos': 'https://api.github.com/user/repos?sort=updated&direction=desc',
+            'starred': 'https://api.github.com/user/starred?sort=created&direction=desc'
+        }
+        self.graphql_url = 'https://api.github.com/graphql'
+        # 完整加载时使用的接口，'rest' 或 'graphql'；增量同步始终走 REST 的条件请求。
+        # REST 拿到第一页的总页数后可以并发获取其余页面；GraphQL 按游标逐页串行请求，
+        # 列表较大时明显更慢，只在需要节省 core 额度时再设为 'graphql'
+        self.fetch_mode = 'rest'
+        self.per_page = 100
+        self.max_concurrent_pages = 6
+        # 按 (token, 用户名, 列表类型) 合并并发的预加载请求
+        self.inflight = {}
+        self.finished_at = {}
+        # 本次加载中已经分批推送到界面的列表，以及累计失败的加载次数
+        self.pushed_batches = set()
+        # 允许分批推送的列表：只有冷启动（还没有缓存的列表）时才边加载边显示
+        self.streaming = set()
+        self.load_failures = 0
+        self.fresh_window = 30
+        # 缓存在这个时间（秒）内视为新鲜，直接使用而不访问网络；
+        # 过期的缓存先显示出来，再在后台重新验证
+        self.cache_ttl = 600
+        # 当前账号；切换账号时取消其他账号的加载，已获取的页面保存为检查点
+        self.active_account = None
+        self.checkpoint_ttl = 3600
+        # 后台定时刷新：数据经常变化时缩短间隔，长时间不变时逐步拉长
+        self.refresh_task = None
+        self.refresh_interval = 300
+        self.min_refresh_interval = 120
+        self.max_refresh_interval = 3600
+        self.hidden_refresh_factor = 4
+        self.low_rate_limit_ratio = 0.2
+        self.window_visible = True
+        # 仓库详情按需获取：内存中只保留最近用到的几个，其余在数据库的 details 表中
+        self.details = OrderedDict()
+        self.max_details_in_memory = 32
+        self.details_ttl = 3600
 
+    async def preload_repos(self, token, username, incremental=True, max_age=None, force=False):
+        # force 表示用户手动刷新：忽略缓存的新鲜度，加载完成后总是通知界面；
+        # 否则缓存未超过 max_age（默认 cache_ttl）时不访问网络，重新验证没有变化时也不通知界面
         print(f"开始为 {username} 预加载仓库列表")
-        headers = {'Authorization': f'token {token}'}
-        all_repos = []
-        starred_repos = []
-        page = 1
-        per_page = 100
+        headers = self.client.auth_headers(token)
+        progress = PreloadProgress(self.preload_progress)
+        semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        self.active_account = (token, username)
+        self.cancel_tasks(keep_account=self.active_account)
+
+        # 两个列表互不等待，各自加载完成后立即通知对应的标签页
+        if max_age is None:
+            max_age = self.cache_ttl
+        all_repos, starred_repos = await asyncio.gather(
+            self.single_flight(token, username, 'repos', headers, incremental, progress, semaphore, max_age, force),
+            self.single_flight(token, username, 'starred', headers, incremental, progress, semaphore, max_age, force)
+        )
+
+        print(f"预加载完成，为 {username} 获取到 {len(all_repos)} 个仓库，{len(starred_repos)} 个星标仓库")
+        if progress.total:
+            self.preload_progress.emit(progress.total, progress.total)
+        return all_repos, starred_repos
+
+    async def single_flight(self, token, username, kind, headers, incremental, progress, semaphore,
+                            max_age=0, force=False):
+        # 同一列表已经在加载时共享这次加载的结果；刚加载完的直接使用内存中的数据
+        key = (token, username, kind)
+        task = self.inflight.get(key)
+        if task is None:
+            finished_at = self.finished_at.get(key)
+            loaded = self.repos if kind == 'repos' else self.starred_repos
+            if (finished_at is not None and username in loaded
+                    and time.monotonic() - finished_at < self.fresh_window):
+                repos = loaded[username]
+                print(f"{username} 的 {kind} 刚刚加载过，直接使用缓存")
+                self.emit_loaded(username, kind, repos)
+                return repos
+            if not force and incremental and self.is_cache_fresh(username, kind, max_age):
+                repos = self.get_cached_list(username, kind)
+                print(f"{username} 的 {kind} 缓存仍然新鲜，不发起网络请求")
+                self.emit_loaded(username, kind, repos)
+                return repos
+            task = asyncio.ensure_future(
+                self.preload_list(username, kind, headers, incremental, progress, semaphore,
+                                  quiet=not force, walk_all=force and kind == 'starred'))
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self.on_flight_done(key, t))
+        else:
+            print(f"{username} 的 {kind} 正在加载，等待已有的请求")
+        repos, emitted, _ = await asyncio.shield(task)
+        if force and not emitted:
+            # 手动刷新合并到了一次没有通知界面的后台验证上，这里补发一次
+            self.emit_loaded(username, kind, repos)
+        return repos
+
+    def is_cache_fresh(self, username, kind, max_age):
+        if max_age <= 0:
+            return False
+        timestamp = self.store.list_timestamp(username, kind)
+        return timestamp is not None and datetime.now() - timestamp < timedelta(seconds=max_age)
+
+    def get_cached_list(self, username, kind):
+        if kind == 'repos':
+            return self.get_preloaded_repos(username)
+        return self.get_preloaded_starred_repos(username)
+
+    def cancel_tasks(self, keep_account=None):
+        for key, task in list(self.inflight.items()):
+            if key[:2] != keep_account:
+                print(f"取消 {key[1]} 的 {key[2]} 预加载")
+                task.cancel()
+
+    def is_active(self, username):
+        return self.active_account is not None and self.active_account[1] == username
+
+    def on_flight_done(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+        # 失败的加载不算刚加载过，下次仍然访问网络
+        if not task.cancelled() and task.exception() is None and task.result()[2]:
+            self.finished_at[key] = time.monotonic()
 
-        async with self.session as session:
-            # 获取所有仓库
+    async def preload_list(self, username, kind, headers, incremental, progress, semaphore, quiet=False,
+                           walk_all=False):
+        # 返回 (列表, 是否已通知界面, 是否加载成功)
+        cached = self.get_cached_list(username, kind) if incremental else None
+
+        self.pushed_batches.discard((username, kind))
+        # 已有缓存时界面上已经显示了列表，退回完整加载也只在结束后应用最终结果，不逐页重绘
+        if cached if cached is not None else self.get_cached_list(username, kind):
+            self.streaming.discard((username, kind))
+        else:
+            self.streaming.add((username, kind))
+        loaded = await self.load_list(self.client, username, kind, headers, cached, progress, semaphore, walk_all)
+        if loaded is None:
+            # 网络不可用或接口出错：保留原有的缓存，不写入数据库
+            self.load_failures += 1
+            repos = cached if cached is not None else self.get_cached_list(username, kind)
+            print(f"加载 {username} 的 {kind} 失败，继续使用缓存的 {len(repos)} 个仓库")
+            if quiet and (username, kind) not in self.pushed_batches:
+                return repos, False, False
+            # 手动刷新需要结束等待；已经分批推送了部分结果时恢复成缓存的列表
+            self.emit_loaded(username, kind, repos)
+            return repos, True, False
+        repos, changed = loaded
+        self.clear_checkpoint(username, kind)
+
+        if kind == 'repos':
+            self.repos[username] = repos
+            self.save_cache(username, changed)
+        else:
+            self.starred_repos[username] = repos
+            self.save_starred_cache(username, changed)
+        if quiet and changed is not None and not changed:
+            # 后台验证没有发现变化，界面上的缓存数据就是最新的，不必重绘
+            print(f"{username} 的 {kind} 没有变化")
+            return repos, False, True
+        self.emit_loaded(username, kind, repos)
+        return repos, True, True
+
+    def emit_loaded(self, username, kind, repos):
+        if not self.is_active(username):
+            return
+        if kind == 'repos':
+            self.preload_completed.emit(repos)
+            # 生成仓库使用总结
+            summary = self.generate_repo_summary(repos)
+            self.summary_completed.emit(summary)
+        else:
+            self.starred_repos_loaded.emit(repos)
+
+    def emit_batch(self, username, kind, batch, first):
+        # 已切换账号时不再把旧账号的数据推送到界面
+        if not self.is_active(username) or (username, kind) not in self.streaming:
+            return
+        self.pushed_batches.add((username, kind))
+        if kind == 'repos':
+            self.repos_batch_loaded.emit(batch, first)
+        else:
+            self.starred_batch_loaded.emit(batch, first)
+
+    async def load_list(self, session, username, kind, headers, cached, progress, semaphore, walk_all=False):
+        # 返回 (完整列表, 有变化的仓库)，完整加载时第二项为 None；加载失败时返回 None
+        if cached:
+            synced = await self.sync_list(session, kind, headers, cached, progress, walk_all)
+            if synced is not None:
+                return synced
+            print(f"增量同步 {kind} 失败或数量不一致，改为完整加载")
+        if self.fetch_mode == 'graphql':
+            repos = await self.fetch_all_graphql(session, username, kind, headers, progress)
+            if repos is not None:
+                return repos, None
+            print(f"通过 GraphQL 加载 {kind} 失败，改用 REST 接口")
+        repos = await self.fetch_all_pages(session, username, kind, headers, progress, semaphore)
+        if repos is None:
+            return None
+        return repos, None
+
+    @staticmethod
+    def project_page(items):
+        # 条件请求缓存中的列表页只保存摘要字段，不保留接口返回的全部字段
+        return [RepoRecord.from_dict(item).to_dict() for item in items]
+
+    def project_repo(self, repo):
+        # 只保留列表视图、搜索和总结实际用到的字段
+        return self.pool.intern(RepoRecord.from_dict(repo))
+
+    def graphql_to_repo(self, node):
+        # 转换成与 REST 接口相同的字段名，各标签页无需区分数据来源
+        language = node.get('primaryLanguage')
+        owner = node.get('owner')
+        return self.pool.intern(RepoRecord(
+            node['databaseId'],
+            node['name'],
+            owner['login'] if owner else None,
+            node.get('description'),
+            language['name'] if language else None,
+            node.get('stargazerCount', 0),
+            node.get('forkCount', 0),
+            node.get('isFork', False),
+            node.get('updatedAt'),
+            node.get('pushedAt'),
+            node['nameWithOwner'],
+            node['url'],
+            node['url'] + '.git'
+        ))
+
+    async def fetch_all_graphql(self, session, username, kind, headers, progress):
+        repos = []
+        cursor = None
+        checkpoint = self.load_checkpoint(username, kind, 'graphql')
+        if checkpoint:
+            # 从上次被取消的位置继续
+            repos = [self.project_repo(repo) for repo in checkpoint['repos']]
+            cursor = checkpoint['cursor']
+            self.emit_batch(username, kind, repos, True)
+        first_request = True
+        progress.expect(1)
+        try:
             while True:
-                try:
-                    url = f'https://api.github.com/user/repos?page={page}&per_page={per_page}'
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 200:
-                            repos = await response.json()
-                            if not repos:
-                                break
-                            all_repos.extend(repos)
-                            self.preload_progress.emit(len(all_repos), len(all_repos))
-                            page += 1
-                        else:
-                            break
-                except aiohttp.ClientError:
+                batch = await self.fetch_graphql_page(session, kind, headers, cursor, progress)
+                if batch is None:
+                    return None
+                connection, nodes = batch
+                self.emit_batch(username, kind, nodes, not repos)
+                repos.extend(nodes)
+                if first_request:
+                    first_request = False
+                    remaining_pages = -(-(connection['totalCount'] - len(repos)) // self.per_page)
+                    progress.expect(max(remaining_pages, 0))
+                if not connection['pageInfo']['hasNextPage']:
                     break
+                cursor = connection['pageInfo']['endCursor']
+        except asyncio.CancelledError:
+            if repos:
+                self.save_checkpoint(username, kind, {'mode': 'graphql', 'cursor': cursor,
+                                                      'repos': [repo.to_dict() for repo in repos]})
+            raise
+        return repos
 
-            # 获取星标仓库
-            page = 1
-            while True:
-                url = f'https://api.github.com/user/starred?page={page}&per_page={per_page}'
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        starred = await response.json()
-                        if not starred:
-                            break
-                        starred_repos.extend(starred)
-                        page += 1
-                    else:
-                        break
+    async def fetch_graphql_page(self, session, kind, headers, cursor, progress):
+        payload = {
+            'query': GRAPHQL_QUERIES[kind],
+            'variables': {'cursor': cursor, 'perPage': self.per_page}
+        }
+        try:
+            async with session.post(self.graphql_url, headers=headers, json=payload,
+                                    priority=RateLimitScheduler.BACKGROUND) as response:
+                if response.status != 200:
+                    print(f"GraphQL 请求 {kind} 失败: {response.status}")
+                    return None
+                result = await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"GraphQL 请求 {kind} 时发生错误: {str(e)}")
+            return None
+        finally:
+            progress.page_done()
 
-        print(f"预加载完成，为 {username} 获取到 {len(all_repos)} 个仓库，{len(starred_repos)} 个星标仓库")
-        self.repos[username] = all_repos
-        self.starred_repos[username] = starred_repos
-        self.save_cache(username)
-        self.save_starred_cache(username)
-        self.preload_completed.emit(all_repos)
-        self.starred_repos_loaded.emit(starred_repos)
-        self.preload_progress.emit(len(all_repos), len(all_repos))
-        
-        # 生成仓库使用总结
-        summary = self.generate_repo_summary(all_repos)
-        self.summary_completed.emit(summary)
+        if result.get('errors') or not result.get('data'):
+            print(f"GraphQL 请求 {kind} 返回错误: {result.get('errors')}")
+            return None
+        connection = result['data']['viewer']['list']
+        return connection, [self.graphql_to_repo(node) for node in connection['nodes'] if node]
+
+    def page_url(self, kind, page, per_page=None):
+        return f'{self.endpoints[kind]}&page={page}&per_page={per_page or self.per_page}'
+
+    @staticmethod
+    def matches_cache(kind, repo, cached_by_id):
+        cached_repo = cached_by_id.get(repo['id'])
+        if cached_repo is None:
+            return False
+        # 星标列表按加星时间排序，星标数、描述等变化不会让仓库排到前面，
+        # 需要比较摘要字段本身才能发现
+        if kind == 'starred':
+            return cached_repo == RepoRecord.from_dict(repo)
+        return cached_repo.updated_ts == parse_time(repo.get('updated_at'))
+
+    async def sync_list(self, session, kind, headers, cached, progress, walk_all=False):
+        # 从最近变化的一页开始向后取，遇到整页都与缓存一致时停止；
+        # walk_all 时（手动刷新）取完所有页面，没有变化的页面只是一个返回 304 的条件请求
+        cached_by_id = {repo['id']: repo for repo in cached}
+        changed = []
+        page = 1
+        while True:
+            progress.expect(1)
+            url = self.page_url(kind, page)
+            try:
+                response = await self.validator_store.get_json(session, url, headers, project=self.project_page,
+                                                               priority=RateLimitScheduler.BACKGROUND)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"获取 {url} 时发生错误: {str(e)}")
+                return None
+            finally:
+                progress.page_done()
+            if not response.ok:
+                print(f"获取 {url} 失败: {response.status}")
+                return None
+            fresh = [self.project_repo(repo) for repo in response.data
+                     if not self.matches_cache(kind, repo, cached_by_id)]
+            changed.extend(fresh)
+            if (not fresh and not walk_all) or len(response.data) < self.per_page:
+                break
+            page += 1
+
+        changed_by_id = {repo['id']: repo for repo in changed}
+        if kind == 'starred':
+            # 星标列表按加星时间排序：只有新加星的仓库排到最前面，
+            # 内容有变化的仓库在原来的位置上替换
+            added = [repo for repo in changed if repo['id'] not in cached_by_id]
+            merged = added + [changed_by_id.get(repo['id'], repo) for repo in cached]
+        else:
+            merged = changed + [repo for repo in cached if repo['id'] not in changed_by_id]
+
+        # 删除的仓库无法从变化列表中看出，用总数检查发现后再完整加载
+        progress.expect(1)
+        try:
+            remote_count = await self.fetch_count(session, kind, headers)
+        finally:
+            progress.page_done()
+        if remote_count != len(merged):
+            return None
+        print(f"增量同步 {kind}: {len(changed)} 个仓库有变化")
+        return merged, changed
+
+    async def fetch_count(self, session, kind, headers):
+        # per_page=1 时最后一页的页码就是总数
+        url = self.page_url(kind, 1, per_page=1)
+        try:
+            response = await self.validator_store.get_json(session, url, headers, project=self.project_page,
+                                                           priority=RateLimitScheduler.BACKGROUND)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"获取 {url} 时发生错误: {str(e)}")
+            return None
+        if not response.ok:
+            return None
+        return self.parse_last_page(response.link) or len(response.data)
+
+    async def fetch_all_pages(self, session, username, kind, headers, progress, semaphore):
+        # 先取第一页，从 Link 头中得到总页数，再以有限的并发数获取剩余页面；
+        # 任何一页失败时返回 None，不能把缺页的列表当作完整的数据
+        progress.expect(1)
+        try:
+            first = await self.fetch_first_page(session, kind, headers)
+        finally:
+            progress.page_done()
+        if first is None:
+            return None
+        first_page, last_page = first
+
+        # 页面可能乱序返回，只按页码顺序连续地向界面推送，保证列表顺序稳定
+        pages = {1: [self.project_repo(repo) for repo in first_page]}
+        checkpoint = self.load_checkpoint(username, kind, 'rest')
+        if checkpoint and checkpoint['last_page'] == last_page:
+            # 列表按最近变化排序：第一页与检查点中的第一页完全相同，说明之后没有仓库变化或新增，
+            # 其余页面的内容和位置也不会变，可以沿用上次被取消前已经取到的页面
+            saved_first = [self.project_repo(repo) for repo in checkpoint['pages'].get('1', ())]
+            if saved_first == pages[1]:
+                for page, repos in checkpoint['pages'].items():
+                    pages.setdefault(int(page), [self.project_repo(repo) for repo in repos])
+            else:
+                print(f"{kind} 在检查点之后有变化，重新获取所有页面")
+        missing_pages = [page for page in range(2, last_page + 1) if page not in pages]
+        progress.expect(len(missing_pages))
+        next_page = 1
+        failed = []
+
+        def flush_pages():
+            nonlocal next_page
+            while next_page in pages:
+                self.emit_batch(username, kind, pages[next_page], next_page == 1)
+                next_page += 1
+
+        async def fetch(page):
+            repos = await self.fetch_page(session, kind, page, headers, semaphore, progress)
+            if repos is None:
+                failed.append(page)
+                return
+            pages[page] = [self.project_repo(repo) for repo in repos]
+            flush_pages()
+
+        def save_pages():
+            saved_pages = {page: [repo.to_dict() for repo in repos] for page, repos in pages.items()}
+            self.save_checkpoint(username, kind, {'mode': 'rest', 'last_page': last_page, 'pages': saved_pages})
+
+        flush_pages()
+        try:
+            await asyncio.gather(*[fetch(page) for page in missing_pages])
+        except asyncio.CancelledError:
+            save_pages()
+            raise
+        if failed:
+            # 已取到的页面保存为检查点，下次加载只需补上失败的页面
+            print(f"获取 {kind} 的第 {sorted(failed)} 页失败，保留原有缓存")
+            save_pages()
+            return None
+        # 加载期间有仓库变化时同一个仓库可能出现在相邻的两页中，按 id 只保留第一次出现的
+        repos = []
+        seen = set()
+        for page in range(1, max(last_page, 1) + 1):
+            for repo in pages[page]:
+                if repo.id not in seen:
+                    seen.add(repo.id)
+                    repos.append(repo)
+        return repos
+
+    @staticmethod
+    def parse_last_page(link_header):
+        # 从 Link 头中解析 rel="last" 对应的页码，没有该项说明只有一页
+        if not link_header:
+            return None
+        match = re.search(r'<([^>]+)>;\s*rel="last"', link_header)
+        if not match:
+            return None
+        query = parse_qs(urlparse(match.group(1)).query)
+        try:
+            return int(query['page'][0])
+        except (KeyError, ValueError):
+            return None
+
+    async def fetch_first_page(self, session, kind, headers):
+        url = self.page_url(kind, 1)
+        try:
+            response = await self.validator_store.get_json(session, url, headers, project=self.project_page,
+                                                           priority=RateLimitScheduler.BACKGROUND)
+            if not response.ok:
+                print(f"获取 {url} 失败: {response.status}")
+                return None
+            last_page = self.parse_last_page(response.link)
+            return response.data, last_page or (1 if response.data else 0)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"获取 {url} 时发生错误: {str(e)}")
+            return None
+
+    async def fetch_page(self, session, kind, page, headers, semaphore, progress):
+        url = self.page_url(kind, page)
+        async with semaphore:
+            try:
+                response = await self.validator_store.get_json(session, url, headers, project=self.project_page,
+                                                               priority=RateLimitScheduler.BACKGROUND)
+                if response.ok:
+                    return response.data
+                print(f"获取 {url} 失败: {response.status}")
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"获取 {url} 时发生错误: {str(e)}")
+                return None
+            finally:
+                progress.page_done()
 
     def generate_repo_summary(self, repos):
         # 按照更新时间、星标数和提交频率对仓库进行排序
         sorted_repos = sorted(repos, key=lambda r: (
-            datetime.strptime(r['updated_at'], "%Y-%m-%dT%H:%M:%SZ"),
-            r['stargazers_count'],
-            r['pushed_at']
+            r.updated_ts or 0,
+            r.stargazers_count,
+            r.pushed_ts or 0
         ), reverse=True)
 
         # 取前10个最常用的仓库
@@ -100,82 +597,244 @@ class Preloader(QtCore.QObject):
 
         return summary
 
-    def start_preload(self, token, username):
-        if self.loop is None or self.loop.is_closed():
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-        
-        future = asyncio.run_coroutine_threadsafe(self.preload_repos(token, username), self.loop)
-        future.add_done_callback(lambda f: print("预加载完成"))
+    def start_preload(self, token, username, incremental=True, force=False):
+        future = self.client.submit(self.preload_repos(token, username, incremental, force=force))
+        future.add_done_callback(self.on_preload_done)
+
+    def cancel_preload(self):
+        # 切换 token 时由界面调用，新账号登录前先停止当前的加载
+        def cancel():
+            self.active_account = None
+            self.cancel_tasks()
+            self.cancel_auto_refresh()
+        self.loop.call_soon_threadsafe(cancel)
+
+    def start_auto_refresh(self, token, username):
+        def start():
+            self.cancel_auto_refresh()
+            self.refresh_task = asyncio.ensure_future(self.auto_refresh(token, username))
+        self.loop.call_soon_threadsafe(start)
+
+    def stop_auto_refresh(self):
+        self.loop.call_soon_threadsafe(self.cancel_auto_refresh)
+
+    def cancel_auto_refresh(self):
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+
+    def set_window_visible(self, visible):
+        self.window_visible = visible
+
+    def next_refresh_delay(self, interval, token):
+        delay = interval
+        if not self.window_visible:
+            delay *= self.hidden_refresh_factor
+        # 额度偏低时至少等到额度重置
+        core = self.client.budget(token, 'core')
+        if core.reset_at and core.remaining < core.limit * self.low_rate_limit_ratio:
+            delay = max(delay, core.reset_at - time.time())
+        return delay
+
+    async def auto_refresh(self, token, username):
+        # 每次都是增量同步，没有变化时只有几个返回 304 的条件请求
+        interval = self.refresh_interval
+        while True:
+            await asyncio.sleep(self.next_refresh_delay(interval, token))
+            before = (self.repos.get(username), self.starred_repos.get(username))
+            failures = self.load_failures
+            try:
+                after = await self.preload_repos(token, username, incremental=True, max_age=0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"后台刷新失败: {str(e)}")
+                after = None
+            if after is None or self.load_failures != failures:
+                # 加载失败（通常是网络不可用）时拉长间隔，不要更频繁地重试
+                interval = min(self.max_refresh_interval, interval * 2)
+                print(f"后台刷新失败，下次刷新间隔 {interval:.0f} 秒")
+                continue
+            if after != before:
+                interval = max(self.min_refresh_interval, interval / 2)
+            else:
+                interval = min(self.max_refresh_interval, interval * 2)
+            print(f"后台刷新完成，{'有' if after != before else '没有'}变化，下次刷新间隔 {interval:.0f} 秒")
+
+    @staticmethod
+    def on_preload_done(future):
+        if future.cancelled():
+            print("预加载已取消")
+        elif future.exception() is not None:
+            print(f"预加载失败: {future.exception()}")
+        else:
+            print("预加载完成")
 
     def get_preloaded_repos(self, username):
         if username not in self.repos:
             self.load_cache(username)
         return self.repos.get(username, [])
 
-    def save_cache(self, username):
-        cache_file = os.path.join(self.cache_dir, f'{username}_repos_cache.json')
-        cache_data = {
-            'timestamp': datetime.now().isoformat(),
-            'repos': self.repos[username]
-        }
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        print(f"保存仓库缓存到 {cache_file}")
+    def legacy_cache_file(self, username, kind):
+        if kind == 'repos':
+            return os.path.join(self.cache_dir, f'{username}_repos_cache.json')
+        return os.path.join(self.cache_dir, f'{username}_starred_repos_cache.json')
+
+    def save_list(self, username, kind, repos, changed=None):
+        # 增量同步只写入有变化的仓库，完整加载才整体替换
+        if changed is None:
+            self.write_behind.replace(username, kind, repos)
+        else:
+            self.write_behind.upsert_front(username, kind, changed, len(repos))
+
+    def loaded_list(self, username, kind):
+        loaded = self.repos if kind == 'repos' else self.starred_repos
+        return loaded.get(username)
+
+    def flush_cache(self):
+        # 把尚未写入的修改交给写入线程，并等待写入完成
+        self.write_behind.flush()
+        self.writer.flush()
+
+    def record_created(self, username, repo):
+        # 新建仓库后直接放到列表最前面，不必重新加载整个列表
+        record = self.project_repo(repo)
+        repos = [record] + [r for r in self.get_preloaded_repos(username) if r.id != record.id]
+        self.repos[username] = repos
+        self.write_behind.upsert_front(username, 'repos', [record], len(repos))
+        self.emit_loaded(username, 'repos', repos)
+
+    def record_deleted(self, username, repo_names):
+        repos = self.get_preloaded_repos(username)
+        names = {name.lower() for name in repo_names}
+        removed = {r.id for r in repos if r.name.lower() in names
+                   and (r.owner_login or '').lower() == username.lower()}
+        if not removed:
+            return
+        kept = [r for r in repos if r.id not in removed]
+        self.repos[username] = kept
+        self.write_behind.remove(username, 'repos', removed, len(kept))
+        self.emit_loaded(username, 'repos', kept)
+
+    def load_list_cache(self, username, kind):
+        # 这个列表还有没写入数据库的修改时直接使用修改后的内容，不等待写入线程；
+        # 其他列表的写入不影响这里读到的数据
+        op = self.write_behind.latest(username, kind)
+        if op is not None:
+            if op[0] == 'replace':
+                return self.pool.intern_all(op[1])
+            if op[0] == 'clear':
+                return None
+            # 只有增量修改时需要先写完才能读到完整列表；增量修改时列表都在内存中，很少走到这里
+            self.write_behind.wait_written(username, kind)
+        repos = self.store.load(username, kind)
+        if repos is None:
+            legacy_file = self.legacy_cache_file(username, kind)
+            if not os.path.exists(legacy_file) or not self.store.import_json(username, kind, legacy_file):
+                print(f"{username} 的 {kind} 缓存不存在")
+                return None
+            repos = self.store.load(username, kind)
+        print(f"从缓存加载了 {username} 的 {len(repos)} 个 {kind}")
+        return self.pool.intern_all(repos)
+
+    def save_cache(self, username, changed=None):
+        self.save_list(username, 'repos', self.repos[username], changed)
 
     def load_cache(self, username):
-        cache_file = os.path.join(self.cache_dir, f'{username}_repos_cache.json')
-        if not os.path.exists(cache_file):
-            print(f"仓库缓存文件不存在: {cache_file}")
+        repos = self.load_list_cache(username, 'repos')
+        if repos is None:
             return False
-        
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        
-        self.repos[username] = cache_data['repos']
-        print(f"从 {cache_file} 加载了 {len(self.repos[username])} 个仓库")
+        self.repos[username] = repos
         return True
 
     def clear_repos_cache(self, username):
-        cache_file = os.path.join(self.cache_dir, f'{username}_repos_cache.json')
-        if os.path.exists(cache_file):
-            os.remove(cache_file)
+        self.write_behind.clear(username, 'repos')
         self.repos.pop(username, None)
 
     def clear_starred_cache(self, username):
-        starred_cache_file = os.path.join(self.cache_dir, f'{username}_starred_repos_cache.json')
-        if os.path.exists(starred_cache_file):
-            os.remove(starred_cache_file)
+        self.write_behind.clear(username, 'starred')
         self.starred_repos.pop(username, None)
 
-    def save_starred_cache(self, username):
-        cache_file = os.path.join(self.cache_dir, f'{username}_starred_repos_cache.json')
-        cache_data = {
-            'timestamp': datetime.now().isoformat(),
-            'repos': self.starred_repos[username]
-        }
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        print(f"保存星标仓库缓存到 {cache_file}")
+    def save_starred_cache(self, username, changed=None):
+        self.save_list(username, 'starred', self.starred_repos[username], changed)
 
     def load_starred_cache(self, username):
-        cache_file = os.path.join(self.cache_dir, f'{username}_starred_repos_cache.json')
-        if not os.path.exists(cache_file):
-            print(f"星标仓库缓存文件不存在: {cache_file}")
+        repos = self.load_list_cache(username, 'starred')
+        if repos is None:
             return False
-        
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        
-        self.starred_repos[username] = cache_data['repos']
-        print(f"从 {cache_file} 加载了 {len(self.starred_repos[username])} 个星标仓库")
+        self.starred_repos[username] = repos
         return True
 
+    async def get_repo_details(self, token, repo):
+        # 完整的仓库信息（默认分支、权限、许可证等），只在选中、克隆或上传时才需要
+        repo_id = repo['id']
+        if repo_id in self.details:
+            self.details.move_to_end(repo_id)
+            return self.details[repo_id]
+
+        stored = self.store.load_details(repo_id)
+        if stored is not None and datetime.now() - stored[1] < timedelta(seconds=self.details_ttl):
+            details = stored[0]
+        else:
+            url = f"https://api.github.com/repos/{repo['full_name']}"
+            try:
+                response = await self.validator_store.get_json(self.client, url, self.client.auth_headers(token))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"获取 {url} 时发生错误: {str(e)}")
+                response = None
+            if response is None or not response.ok:
+                # 网络不可用时退回到过期的详情或摘要字段
+                return stored[0] if stored is not None else repo.to_dict()
+            details = response.data
+            self.writer.call(self.store.save_details, repo_id, details)
+
+        self.details[repo_id] = details
+        if len(self.details) > self.max_details_in_memory:
+            self.details.popitem(last=False)
+        return details
+
     def get_preloaded_starred_repos(self, username):
         if username not in self.starred_repos:
             self.load_starred_cache(username)
         return self.starred_repos.get(username, [])
 
+    def checkpoint_file(self, username, kind):
+        return os.path.join(self.cache_dir, f'{username}_{kind}_checkpoint{cache_io.EXTENSION}')
+
+    def legacy_checkpoint_file(self, username, kind):
+        return os.path.join(self.cache_dir, f'{username}_{kind}_checkpoint.json')
+
+    def save_checkpoint(self, username, kind, checkpoint):
+        checkpoint['timestamp'] = datetime.now().isoformat()
+        self.writer.write(self.checkpoint_file(username, kind), checkpoint)
+        print(f"保存 {username} 的 {kind} 加载检查点")
+
+    def load_checkpoint(self, username, kind, mode):
+        checkpoint_file = self.checkpoint_file(username, kind)
+        if not self.writer.exists(checkpoint_file):
+            checkpoint_file = self.legacy_checkpoint_file(username, kind)
+            if not os.path.exists(checkpoint_file):
+                return None
+        try:
+            checkpoint, _ = self.writer.read(checkpoint_file)
+        except (OSError, ValueError, zlib.error):
+            return None
+        age = datetime.now() - datetime.fromisoformat(checkpoint['timestamp'])
+        if checkpoint.get('mode') != mode or age > timedelta(seconds=self.checkpoint_ttl):
+            return None
+        print(f"从检查点恢复 {username} 的 {kind} 加载")
+        return checkpoint
+
+    def clear_checkpoint(self, username, kind):
+        self.writer.remove(self.checkpoint_file(username, kind))
+        self.writer.remove(self.legacy_checkpoint_file(username, kind))
+
+    def shutdown(self):
+        # 退出时写入所有尚未保存的修改，再关闭数据库
+        self.write_behind.flush()
+        self.writer.shutdown()
+        self.store.close()
+
     def clear_all_cache(self, username):
         self.clear_repos_cache(username)
         self.clear_starred_cache(username)
@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import itertools
+import time
+from PyQt6 import QtCore
+
+
+class RateLimitBucket:
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at = 0
+        self.blocked_until = 0
+        self.in_flight = 0
+
+    def wait_time(self, reserve=0):
+        # 返回还需要等待的秒数，0 表示现在可以发出请求
+        now = time.time()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if self.reset_at and now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0
+        if self.remaining - self.in_flight > reserve:
+            return 0
+        if self.reset_at:
+            return max(self.reset_at - now, 0.1)
+        # 预算被进行中的请求占满时，等它们返回后再判断
+        return None
+
+
+# 各类接口的默认额度，收到响应后以限流头为准；匿名请求的额度低得多
+DEFAULT_LIMITS = {'core': 5000, 'search': 30, 'graphql': 5000}
+ANONYMOUS_LIMITS = {'core': 60, 'search': 10, 'graphql': 60}
+
+
+class RateLimitScheduler(QtCore.QObject):
+    # GitHub 对 core、search、graphql 三类接口分别计算限额，并且每个 token 各有一份额度：
+    # 额度按 (认证信息, 接口类别) 分别记录，一个 token 用完额度不影响其他 token 的请求
+    rate_limit_updated = QtCore.pyqtSignal(str, int, int, int)
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+    def __init__(self, max_concurrent=16, background_reserve=0.1):
+        super().__init__()
+        self.buckets = {}
+        self.max_concurrent = max_concurrent
+        # 后台请求不能用掉最后这部分额度，留给登录、搜索等交互请求
+        self.background_reserve = background_reserve
+        self.active = 0
+        self.waiting = []
+        self.counter = itertools.count()
+        self.wakeup = None
+        self.wakeup_at = 0
+
+    def bucket(self, resource, key=None):
+        # key 是请求使用的 Authorization 头，匿名请求为 None
+        bucket = self.buckets.get((key, resource))
+        if bucket is None:
+            limits = DEFAULT_LIMITS if key else ANONYMOUS_LIMITS
+            bucket = self.buckets[(key, resource)] = RateLimitBucket(resource, limits[resource])
+        return bucket
+
+    @staticmethod
+    def resource_for(url):
+        if '/search/' in url:
+            return 'search'
+        if url.rstrip('/').endswith('/graphql'):
+            return 'graphql'
+        return 'core'
+
+    async def acquire(self, resource, priority, key=None):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (priority, next(self.counter), (key, resource), future))
+        self.dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已经分到名额但调用方被取消，需要归还
+                self.release(resource, key)
+            else:
+                self.waiting = [item for item in self.waiting if item[3] is not future]
+                heapq.heapify(self.waiting)
+            raise
+
+    def release(self, resource, key=None):
+        self.active -= 1
+        self.bucket(resource, key).in_flight -= 1
+        self.dispatch()
+
+    def dispatch(self):
+        # 按优先级依次放行，交互请求总是先于后台预加载；
+        # 某一类额度用完时只推迟这一类请求，不影响其他类别
+        shortest_wait = None
+        deferred = []
+        while self.waiting and self.active < self.max_concurrent:
+            priority, order, budget, future = heapq.heappop(self.waiting)
+            if future.done():
+                continue
+            bucket = self.bucket(budget[1], budget[0])
+            reserve = int(bucket.limit * self.background_reserve) if priority == self.BACKGROUND else 0
+            wait = bucket.wait_time(reserve)
+            if wait == 0:
+                self.active += 1
+                bucket.in_flight += 1
+                future.set_result(None)
+                continue
+            deferred.append((priority, order, budget, future))
+            if wait is not None:
+                shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+        for item in deferred:
+            heapq.heappush(self.waiting, item)
+
+        if shortest_wait is not None:
+            wakeup_at = time.time() + shortest_wait
+            if self.wakeup is None or wakeup_at < self.wakeup_at:
+                if self.wakeup is not None:
+                    self.wakeup.cancel()
+                self.wakeup_at = wakeup_at
+                self.wakeup = asyncio.get_running_loop().call_later(shortest_wait, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self.wakeup = None
+        self.dispatch()
+
+    def update(self, resource, status, headers, key=None):
+        bucket = self.bucket(resource, key)
+        try:
+            if 'X-RateLimit-Limit' in headers:
+                bucket.limit = int(headers['X-RateLimit-Limit'])
+            if 'X-RateLimit-Remaining' in headers:
+                bucket.remaining = int(headers['X-RateLimit-Remaining'])
+            if 'X-RateLimit-Reset' in headers:
+                bucket.reset_at = int(headers['X-RateLimit-Reset'])
+        except ValueError:
+            pass
+
+        # 触发二级限流时按 Retry-After 等待，额度用完时等到重置时间
+        if status in (403, 429):
+            retry_after = headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                bucket.blocked_until = time.time() + int(retry_after)
+            elif bucket.remaining == 0 and bucket.reset_at:
+                bucket.blocked_until = bucket.reset_at
+
+        self.rate_limit_updated.emit(resource, bucket.remaining, bucket.limit, bucket.reset_at)
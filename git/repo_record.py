@@ -0,0 +1,156 @@
+import sys
+import time
+import weakref
+from datetime import datetime
+
+# 列表视图、搜索、排序和缓存用到的字段，与 REST 接口返回的字段名一致
+FIELDS = (
+    'id', 'name', 'full_name', 'description', 'language', 'stargazers_count', 'forks_count',
+    'html_url', 'clone_url', 'updated_at', 'pushed_at', 'fork', 'owner'
+)
+
+GITHUB_URL = 'https://github.com/'
+
+
+def parse_time(value):
+    if not value:
+        return None
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+def format_time(timestamp):
+    if timestamp is None:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def intern(value):
+    return sys.intern(value) if value else value
+
+
+class RepoRecord:
+    # 各标签页共用的精简仓库记录，预加载时构建一次。
+    # 语言和所有者字符串做驻留，时间转成整数秒，
+    # 可以由所有者和名称推出的 full_name、html_url、clone_url 不单独保存
+    __slots__ = (
+        'id', 'name', 'owner_login', 'description', 'language', 'stargazers_count', 'forks_count',
+        'fork', 'updated_ts', 'pushed_ts', '_full_name', '_html_url', '_clone_url', '__weakref__'
+    )
+
+    def __init__(self, id, name, owner_login=None, description=None, language=None, stargazers_count=0,
+                 forks_count=0, fork=False, updated_at=None, pushed_at=None, full_name=None,
+                 html_url=None, clone_url=None):
+        self.id = id
+        self.name = name
+        self.owner_login = intern(owner_login)
+        self.description = description
+        self.language = intern(language)
+        self.stargazers_count = stargazers_count or 0
+        self.forks_count = forks_count or 0
+        self.fork = bool(fork)
+        self.updated_ts = parse_time(updated_at)
+        self.pushed_ts = parse_time(pushed_at)
+        self._full_name = None
+        self._html_url = None
+        self._clone_url = None
+        if full_name and full_name != self.full_name:
+            self._full_name = full_name
+        if html_url and html_url != self.html_url:
+            self._html_url = html_url
+        if clone_url and clone_url != self.clone_url:
+            self._clone_url = clone_url
+
+    @classmethod
+    def from_dict(cls, repo):
+        owner = repo.get('owner')
+        if isinstance(owner, dict):
+            owner = owner.get('login')
+        return cls(
+            repo['id'], repo.get('name'), owner, repo.get('description'), repo.get('language'),
+            repo.get('stargazers_count'), repo.get('forks_count'), repo.get('fork'),
+            repo.get('updated_at'), repo.get('pushed_at'), repo.get('full_name'),
+            repo.get('html_url'), repo.get('clone_url')
+        )
+
+    @property
+    def full_name(self):
+        if self._full_name:
+            return self._full_name
+        return f'{self.owner_login}/{self.name}' if self.owner_login else self.name
+
+    @property
+    def html_url(self):
+        return self._html_url or GITHUB_URL + self.full_name
+
+    @property
+    def clone_url(self):
+        return self._clone_url or self.html_url + '.git'
+
+    @property
+    def updated_at(self):
+        return format_time(self.updated_ts)
+
+    @property
+    def pushed_at(self):
+        return format_time(self.pushed_ts)
+
+    @property
+    def owner(self):
+        return {'login': self.owner_login} if self.owner_login else None
+
+    # 保留字典式访问，原来按 repo['name'] 读取字段的代码无需修改
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def values(self):
+        return (
+            self.id, self.name, self.owner_login, self.description, self.language, self.stargazers_count,
+            self.forks_count, self.fork, self.updated_ts, self.pushed_ts, self._full_name,
+            self._html_url, self._clone_url
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, RepoRecord):
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'RepoRecord({self.id}, {self.full_name!r})'
+
+
+class RecordPool:
+    # 按仓库 id 共享记录：多个账号的列表中出现同一个仓库时只保留一个对象。
+    # 使用弱引用，没有列表再引用的记录会自动释放
+    def __init__(self):
+        self.records = weakref.WeakValueDictionary()
+
+    def intern(self, record):
+        existing = self.records.get(record.id)
+        if existing is not None and existing == record:
+            return existing
+        # 内容有变化时换成新对象，不修改旧对象，
+        # 界面仍然可以通过比较新旧列表判断是否需要重绘
+        self.records[record.id] = record
+        return record
+
+    def intern_all(self, records):
+        return [self.intern(record) for record in records]
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,227 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from . import cache_io
+from .repo_record import RepoRecord, FIELDS as COLUMNS
+
+# 列表视图、搜索和排序用到的字段（COLUMNS）单独成列，方便建索引和直接查询。
+# 每个仓库按 id 只保存一行，各账号的自有/星标列表在 memberships 表中按位置引用仓库 id，
+# 多个账号星标了同一个仓库时不会重复保存
+SCHEMA_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    full_name TEXT,
+    description TEXT,
+    language TEXT,
+    stargazers_count INTEGER,
+    forks_count INTEGER,
+    html_url TEXT,
+    clone_url TEXT,
+    updated_at TEXT,
+    pushed_at TEXT,
+    fork INTEGER,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_repos_name ON repos (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_repos_language ON repos (language COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_repos_stars ON repos (stargazers_count);
+CREATE INDEX IF NOT EXISTS idx_repos_forks ON repos (forks_count);
+CREATE INDEX IF NOT EXISTS idx_repos_updated ON repos (updated_at);
+CREATE TABLE IF NOT EXISTS memberships (
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    repo_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (account, kind, repo_id)
+);
+CREATE INDEX IF NOT EXISTS idx_memberships_position ON memberships (account, kind, position);
+CREATE INDEX IF NOT EXISTS idx_memberships_repo ON memberships (repo_id);
+CREATE TABLE IF NOT EXISTS details (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT,
+    fetched_at TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lists (
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (account, kind)
+);
+'''
+
+# 第 1 版中每个账号、每个列表各存一份仓库行
+V1_INDEXES = ('idx_repos_position', 'idx_repos_name', 'idx_repos_language', 'idx_repos_stars',
+              'idx_repos_forks', 'idx_repos_updated')
+
+SELECT_COLUMNS = ', '.join(f'r.{column}' for column in COLUMNS)
+LIST_QUERY = (f'SELECT {SELECT_COLUMNS} FROM memberships m JOIN repos r ON r.id = m.repo_id '
+              'WHERE m.account = ? AND m.kind = ?')
+
+
+class RepoStore:
+    # 按账号和列表类型（repos/starred）保存仓库，替代每个用户的 JSON 缓存文件。
+    # repos 表只有列表视图和搜索用到的摘要字段，启动时整体读入；
+    # 完整的仓库信息放在 details 表中，选中某个仓库时才按 id 读取
+    def __init__(self, cache_dir):
+        self.db_path = os.path.join(cache_dir, 'repos.db')
+        self.lock = threading.Lock()
+        # 预加载在写入线程写入，界面线程和事件循环线程读取
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.migrate()
+
+    def migrate(self):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(repos)')}
+        legacy = 'account' in columns
+        if legacy:
+            self.conn.execute('ALTER TABLE repos RENAME TO repos_v1')
+            for index in V1_INDEXES:
+                self.conn.execute(f'DROP INDEX IF EXISTS {index}')
+        self.conn.executescript(SCHEMA)
+        if legacy:
+            # 同一个仓库在多个列表中出现时保留任意一行即可，摘要字段相同或只差刷新时间
+            column_list = ', '.join(COLUMNS)
+            self.conn.execute(f'INSERT OR REPLACE INTO repos ({column_list}) SELECT {column_list} FROM repos_v1')
+            self.conn.execute('INSERT OR REPLACE INTO memberships SELECT account, kind, id, position FROM repos_v1')
+            self.conn.execute('DROP TABLE repos_v1')
+            print(f"已将 {self.db_path} 升级为按仓库 id 去重的格式")
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    @staticmethod
+    def row_values(repo):
+        return (
+            repo.id, repo.name, repo.full_name, repo.description, repo.language, repo.stargazers_count,
+            repo.forks_count, repo.html_url, repo.clone_url, repo.updated_at, repo.pushed_at,
+            int(repo.fork), repo.owner_login
+        )
+
+    @staticmethod
+    def row_to_repo(row):
+        return RepoRecord(
+            row['id'], row['name'], row['owner'], row['description'], row['language'],
+            row['stargazers_count'], row['forks_count'], row['fork'], row['updated_at'],
+            row['pushed_at'], row['full_name'], row['html_url'], row['clone_url']
+        )
+
+    def upsert_repos(self, repos):
+        self.conn.executemany(f'INSERT OR REPLACE INTO repos VALUES ({", ".join("?" * len(COLUMNS))})',
+                              [self.row_values(repo) for repo in repos])
+
+    def prune(self):
+        # 不再被任何列表引用的仓库一并删除
+        self.conn.execute('DELETE FROM repos WHERE id NOT IN (SELECT repo_id FROM memberships)')
+        self.conn.execute('DELETE FROM details WHERE id NOT IN (SELECT repo_id FROM memberships)')
+
+    def has_list(self, account, kind):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM lists WHERE account = ? AND kind = ?',
+                                    (account, kind)).fetchone()
+        return row is not None
+
+    def list_timestamp(self, account, kind):
+        with self.lock:
+            row = self.conn.execute('SELECT timestamp FROM lists WHERE account = ? AND kind = ?',
+                                    (account, kind)).fetchone()
+        return datetime.fromisoformat(row['timestamp']) if row else None
+
+    def load(self, account, kind):
+        if not self.has_list(account, kind):
+            return None
+        with self.lock:
+            rows = self.conn.execute(f'{LIST_QUERY} ORDER BY m.position', (account, kind)).fetchall()
+        return [self.row_to_repo(row) for row in rows]
+
+    def replace(self, account, kind, repos):
+        # 完整加载后整体替换这个列表
+        with self.lock, self.conn:
+            self.upsert_repos(repos)
+            self.conn.execute('DELETE FROM memberships WHERE account = ? AND kind = ?', (account, kind))
+            self.conn.executemany('INSERT OR REPLACE INTO memberships VALUES (?, ?, ?, ?)',
+                                  [(account, kind, repo.id, position) for position, repo in enumerate(repos)])
+            self.prune()
+            self.touch(account, kind, len(repos))
+
+    def upsert_front(self, account, kind, changed, count):
+        # 增量同步得到的新仓库和有变化的仓库排在列表最前面，
+        # 只写这些行，其余行的相对顺序不变。
+        # 星标列表按加星时间排序，已经在列表中的仓库只更新内容，不改变位置
+        with self.lock, self.conn:
+            front = changed
+            if kind == 'starred':
+                existing = {row[0] for row in self.conn.execute(
+                    'SELECT repo_id FROM memberships WHERE account = ? AND kind = ?', (account, kind))}
+                front = [repo for repo in changed if repo.id not in existing]
+            row = self.conn.execute('SELECT MIN(position) FROM memberships WHERE account = ? AND kind = ?',
+                                    (account, kind)).fetchone()
+            start = (row[0] if row[0] is not None else 0) - len(front)
+            self.upsert_repos(changed)
+            self.conn.executemany('INSERT OR REPLACE INTO memberships VALUES (?, ?, ?, ?)',
+                                  [(account, kind, repo.id, start + offset) for offset, repo in enumerate(front)])
+            self.touch(account, kind, count)
+
+    def remove(self, account, kind, repo_ids, count):
+        # 删除仓库后只去掉对应的成员行，其余行的位置不变
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM memberships WHERE account = ? AND kind = ? AND repo_id = ?',
+                                  [(account, kind, repo_id) for repo_id in repo_ids])
+            self.prune()
+            self.touch(account, kind, count)
+
+    def touch(self, account, kind, count):
+        self.conn.execute('INSERT OR REPLACE INTO lists VALUES (?, ?, ?, ?)',
+                          (account, kind, datetime.now().isoformat(), count))
+
+    def clear(self, account, kind):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM memberships WHERE account = ? AND kind = ?', (account, kind))
+            self.conn.execute('DELETE FROM lists WHERE account = ? AND kind = ?', (account, kind))
+            self.prune()
+
+    def load_details(self, repo_id):
+        # 返回 (完整信息, 获取时间)，没有保存过时返回 None
+        with self.lock:
+            row = self.conn.execute('SELECT fetched_at, data FROM details WHERE id = ?', (repo_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            details, _ = cache_io.loads(row['data'])
+        except (ValueError, zlib.error):
+            return None
+        return details, datetime.fromisoformat(row['fetched_at'])
+
+    def save_details(self, repo_id, details):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?)',
+                              (repo_id, details.get('full_name'), datetime.now().isoformat(),
+                               cache_io.dumps(details)))
+
+    def import_json(self, account, kind, cache_file):
+        # 把旧版的 JSON 缓存文件迁移到数据库中
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"读取旧缓存文件 {cache_file} 失败: {str(e)}")
+            return False
+        self.replace(account, kind, [RepoRecord.from_dict(repo) for repo in cache_data['repos']])
+        os.remove(cache_file)
+        print(f"已将 {cache_file} 迁移到 {self.db_path}")
+        return True
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -2,10 +2,11 @@ from PyQt6 import QtWidgets, QtCore, QtGui
 import aiohttp
 import asyncio
 import webbrowser
-from .search_widget import SearchWidget  # 导入新创建的 SearchWidget
+from .search_widget import SearchWidget, compile_query  # 导入新创建的 SearchWidget
+from .search_worker import SearchWorker
+from .highlighter import Highlighter
 import os
 import base64
-import requests
 import zipfile
 import io
 import shutil
@@ -22,6 +23,7 @@ class RepositoryTab(QtWidgets.QWidget):
         self.current_username = None
         self.current_token = None
         self.selected_repo = None
+        self.selected_record = None
         self.all_repos = []
         self.progress_dialog = None
         self.current_search_text = ""
@@ -29,6 +31,16 @@ class RepositoryTab(QtWidgets.QWidget):
         
         self.update_repo_list_signal.connect(self._update_repo_list)
         self.add_repo_widget_signal.connect(self._add_repo_widget)
+        self.main_window.preloader.repos_batch_loaded.connect(self.on_repos_batch_loaded)
+        # 过滤在后台线程中进行，结果通过信号回到界面线程
+        self.search_worker = SearchWorker(self)
+        self.search_worker.results_ready.connect(self.on_search_results)
+        self.search_generation = 0
+        # 高亮只在行滚动到可见区域时才生成，滚动或列表变化后合并到下一次事件循环处理
+        self.highlighter = Highlighter()
+        self.highlight_timer = QtCore.QTimer(self)
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.timeout.connect(self.highlight_visible_rows)
         
         self.init_ui()
         self.load_cached_repos()  # 在初始化时加载缓存数据
@@ -67,6 +79,9 @@ class RepositoryTab(QtWidgets.QWidget):
         self.repo_layout.setSpacing(5)  # 减小仓项目之间的间距
         self.repo_layout.setContentsMargins(5, 5, 5, 5)  # 减小边距
         self.scroll_area.setWidget(self.repo_container)
+        scroll_bar = self.scroll_area.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.schedule_highlight)
+        scroll_bar.rangeChanged.connect(self.schedule_highlight)
 
         layout.addWidget(self.scroll_area)
 
@@ -127,8 +142,17 @@ class RepositoryTab(QtWidgets.QWidget):
     def perform_search(self):
         search_text = self.search_widget.search_input.text()
         search_option = self.search_widget.search_options.currentText()
-        filtered_repos = self.filter_repos(search_text, search_option)
-        self._update_repo_list(filtered_repos)  # 修改这里，使用 _update_repo_list 而不是 update_repo_list
+        # 只高亮普通文本部分，lang:、stars: 等限定条件不参与高亮
+        self.current_search_text = compile_query(search_text).text
+        # 新的查询会取消还没完成的上一个查询
+        self.search_generation = self.search_worker.submit(self.all_repos, search_text, search_option)
+
+    @QtCore.pyqtSlot(int, object)
+    def on_search_results(self, generation, result):
+        if generation != self.search_generation:
+            return
+        filtered_repos, _ = result
+        self._update_repo_list(filtered_repos)
         self.search_widget.set_result_count(len(filtered_repos))
 
     def filter_repos(self, search_text, search_option):
@@ -139,17 +163,15 @@ class RepositoryTab(QtWidgets.QWidget):
     def refresh_repos(self):
         if self.current_token and self.current_username:
             self.create_progress_dialog("刷新仓库", "正在获取仓库列表...")
-            self.main_window.preloader.clear_repos_cache(self.current_username)  # 只清除仓库缓存
             self.main_window.preloader.preload_completed.connect(self.on_refresh_completed)
-            self.main_window.preloader.start_preload(self.current_token, self.current_username)
+            self.main_window.preloader.start_preload(self.current_token, self.current_username, force=True)
             self.main_window.log_message("开始刷新仓库列表")
         else:
             QtWidgets.QMessageBox.warning(self, "错误", "请先登录")
             self.main_window.log_message("尝试刷新仓库列表失败：未登录")
 
     def on_refresh_completed(self, repos):
-        self.all_repos = repos
-        self._update_repo_list(repos)
+        self.apply_repos(repos)
         self.has_refreshed = True
         self.main_window.log_message(f"刷新完成，获取到 {len(repos)} 个仓库")
         self.close_progress_dialog()
@@ -173,8 +195,41 @@ class RepositoryTab(QtWidgets.QWidget):
 
         # 更新搜索结果计数
         self.search_widget.set_result_count(len(repos))
+        self.schedule_highlight()
         print("仓库列表更新完成")
 
+    @QtCore.pyqtSlot(list, bool)
+    def on_repos_batch_loaded(self, batch, first):
+        # 还没有缓存的列表时，完整加载每到一页就追加显示，不必等整个列表；
+        # 已有列表时预加载器不分批推送，只通过加载完成的信号应用最终结果
+        if first:
+            self.all_repos = []
+        self.all_repos.extend(batch)
+        if self.search_widget.search_input.text():
+            # 有搜索条件时等整个列表加载完再统一过滤
+            return
+        if first:
+            self._update_repo_list(batch)
+        else:
+            self._append_repo_widgets(batch)
+
+    def _append_repo_widgets(self, repos):
+        # 插入到末尾的弹性空间之前
+        for repo in repos:
+            repo_widget = self.create_repo_widget(repo)
+            self.repo_layout.insertWidget(self.repo_layout.count() - 1, repo_widget)
+        self.search_widget.set_result_count(len(self.all_repos))
+        self.schedule_highlight()
+
+    def apply_repos(self, repos):
+        # 分批推送后界面通常已经是最新的，只有内容不同时才重建
+        unchanged = self.all_repos == repos
+        self.all_repos = repos
+        if self.search_widget.search_input.text():
+            self.perform_search()
+        elif not unchanged:
+            self._update_repo_list(repos)
+
     def update_search_count(self, count):
         self.search_widget.set_result_count(count)
 
@@ -182,6 +237,43 @@ class RepositoryTab(QtWidgets.QWidget):
     def _add_repo_widget(self, repo):
         repo_widget = self.create_repo_widget(repo)
         self.repo_layout.addWidget(repo_widget)
+        self.schedule_highlight()
+
+    def schedule_highlight(self, *args):
+        self.highlight_timer.start(0)
+
+    def highlight_visible_rows(self):
+        # 只为滚动区域中可见的行生成高亮标记，看不到的行保持纯文本
+        self.highlighter.set_query(self.current_search_text)
+        query = self.highlighter.query
+        top = self.scroll_area.verticalScrollBar().value()
+        bottom = top + self.scroll_area.viewport().height()
+        layout = self.repo_layout
+        count = layout.count()
+        # 行从上到下排列，二分查找第一个可见的行
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            widget = layout.itemAt(mid).widget()
+            if widget is None or widget.geometry().bottom() >= top:
+                high = mid
+            else:
+                low = mid + 1
+        for i in range(low, count):
+            widget = layout.itemAt(i).widget()
+            if widget is None or widget.geometry().top() > bottom:
+                break
+            self.highlight_row(widget, query)
+
+    def highlight_row(self, widget, query):
+        if widget.highlight_query == query:
+            return
+        repo = widget.repo
+        markup = self.highlighter.markup
+        widget.name_label.setText(markup(repo['id'], 'name', repo['name']))
+        widget.language_label.setText(f"语言: {markup(repo['id'], 'language', repo['language'] or '未知')}")
+        widget.description_label.setText(markup(repo['id'], 'description', repo['description'] or "No description"))
+        widget.highlight_query = query
 
     def create_repo_widget(self, repo):
         widget = QtWidgets.QWidget()
@@ -199,12 +291,13 @@ class RepositoryTab(QtWidgets.QWidget):
         # 创建一个水平布局来包含名称和言
         top_layout = QtWidgets.QHBoxLayout()
         
-        name_label = QtWidgets.QLabel(SearchWidget.highlight_text(repo['name'], self.current_search_text))
+        # 先显示纯文本，滚动到可见区域时由 highlight_visible_rows 加上高亮
+        name_label = QtWidgets.QLabel(repo['name'])
         name_label.setTextFormat(QtCore.Qt.TextFormat.RichText)
         name_label.setStyleSheet("font-weight: bold;")
         top_layout.addWidget(name_label)
         
-        language_label = QtWidgets.QLabel(f"语言: {SearchWidget.highlight_text(repo['language'] or '未知', self.current_search_text)}")
+        language_label = QtWidgets.QLabel(f"语言: {repo['language'] or '未知'}")
         language_label.setTextFormat(QtCore.Qt.TextFormat.RichText)
         language_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
         top_layout.addWidget(language_label)
@@ -216,7 +309,7 @@ class RepositoryTab(QtWidgets.QWidget):
         url_label.setStyleSheet("font-size: 8pt;")
         layout.addWidget(url_label)
         
-        description_label = QtWidgets.QLabel(SearchWidget.highlight_text(repo['description'] or "No description", self.current_search_text))
+        description_label = QtWidgets.QLabel(repo['description'] or "No description")
         description_label.setTextFormat(QtCore.Qt.TextFormat.RichText)
         description_label.setWordWrap(True)
         description_label.setStyleSheet("font-size: 9pt;")
@@ -231,6 +324,11 @@ class RepositoryTab(QtWidgets.QWidget):
         widget.setLayout(layout)
         widget.repo_name = repo['name']  # 存储仓库名称
         widget.clone_url = repo['clone_url']  # 存储克隆 URL
+        widget.repo = repo
+        widget.name_label = name_label
+        widget.language_label = language_label
+        widget.description_label = description_label
+        widget.highlight_query = ''
         widget.mousePressEvent = lambda event: self.toggle_repo_selection(widget)
         
         return widget
@@ -238,6 +336,7 @@ class RepositoryTab(QtWidgets.QWidget):
     def toggle_repo_selection(self, widget):
         if self.selected_repo == widget.repo_name:
             self.selected_repo = None
+            self.selected_record = None
             widget.setStyleSheet("""
                 QWidget {
                     background-color: white;
@@ -260,6 +359,8 @@ class RepositoryTab(QtWidgets.QWidget):
                         """)
                         break
             self.selected_repo = widget.repo_name
+            self.selected_record = widget.repo
+            self.prefetch_repo_details(widget.repo)
             widget.setStyleSheet("""
                 QWidget {
                     background-color: #e6f3ff;
@@ -268,9 +369,20 @@ class RepositoryTab(QtWidgets.QWidget):
                 }
             """)
 
+    def prefetch_repo_details(self, repo):
+        # 选中时在后台取完整信息，后续上传等操作直接用缓存
+        if self.current_token:
+            self.main_window.http_client.submit(
+                self.main_window.preloader.get_repo_details(self.current_token, repo))
+
     @QtCore.pyqtSlot(str)
     def fetch_repos(self, token):
-        asyncio.create_task(self.fetch_all_repos_async(token))
+        self.main_window.http_client.submit(self.fetch_all_repos_async(token))
+
+    async def fetch_all_repos_async(self, token):
+        # 强制重新验证仓库列表，结果通过预加载器的信号更新界面
+        if self.current_username:
+            await self.main_window.preloader.preload_repos(token, self.current_username, force=True)
 
     def get_event_loop(self):
         try:
@@ -291,9 +403,8 @@ class RepositoryTab(QtWidgets.QWidget):
             description = dialog.description.toPlainText()
             is_private = dialog.private_checkbox.isChecked()
             with_readme = dialog.readme_checkbox.isChecked()
-            asyncio.get_event_loop().call_soon_threadsafe(
-                lambda: asyncio.create_task(self.create_repo_async(repo_name, description, is_private, with_readme))
-            )
+            self.main_window.http_client.submit(
+                self.create_repo_async(repo_name, description, is_private, with_readme))
 
     async def create_repo_async(self, name, description, private, with_readme):
         # 首先检查仓库名是否已存在
@@ -304,43 +415,45 @@ class RepositoryTab(QtWidgets.QWidget):
                                             QtCore.Q_ARG(str, f"仓库名 '{name}' 已存在"))
             return
 
-        headers = {'Authorization': f'token {self.current_token}'}
+        session = self.main_window.http_client
+        headers = session.auth_headers(self.current_token)
         data = {
             "name": name,
             "description": description,
             "private": private,
             "auto_init": with_readme
         }
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post('https://api.github.com/user/repos', headers=headers, json=data) as response:
-                    if response.status == 201:
-                        QtCore.QMetaObject.invokeMethod(self, "show_info_message",
-                                                        QtCore.Qt.ConnectionType.QueuedConnection,
-                                                        QtCore.Q_ARG(str, "成功"),
-                                                        QtCore.Q_ARG(str, f"仓库 '{name}' 创建成功"))
-                        await self.fetch_all_repos_async(self.current_token)
-                    else:
-                        error_msg = await response.text()
-                        QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
-                                                        QtCore.Qt.ConnectionType.QueuedConnection,
-                                                        QtCore.Q_ARG(str, "错误"),
-                                                        QtCore.Q_ARG(str, f"创建仓库失败: {error_msg}"))
-            except aiohttp.ClientError as e:
-                QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
-                                                QtCore.Qt.ConnectionType.QueuedConnection,
-                                                QtCore.Q_ARG(str, "错"),
-                                                QtCore.Q_ARG(str, f"创建仓库时发生错误: {str(e)}"))
+        try:
+            async with session.post('https://api.github.com/user/repos', headers=headers, json=data) as response:
+                if response.status == 201:
+                    created = await response.json()
+                    QtCore.QMetaObject.invokeMethod(self, "show_info_message",
+                                                    QtCore.Qt.ConnectionType.QueuedConnection,
+                                                    QtCore.Q_ARG(str, "成功"),
+                                                    QtCore.Q_ARG(str, f"仓库 '{name}' 创建成功"))
+                    # 直接把新仓库加入缓存的列表
+                    self.main_window.preloader.record_created(self.current_username, created)
+                else:
+                    error_msg = await response.text()
+                    QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
+                                                    QtCore.Qt.ConnectionType.QueuedConnection,
+                                                    QtCore.Q_ARG(str, "错误"),
+                                                    QtCore.Q_ARG(str, f"创建仓库失败: {error_msg}"))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
+                                            QtCore.Qt.ConnectionType.QueuedConnection,
+                                            QtCore.Q_ARG(str, "错"),
+                                            QtCore.Q_ARG(str, f"创建仓库时发生错误: {str(e)}"))
 
     async def check_repo_exists(self, name):
-        headers = {'Authorization': f'token {self.current_token}'}
-        async with aiohttp.ClientSession() as session:
-            try:
-                url = f'https://api.github.com/repos/{self.current_username}/{name}'
-                async with session.get(url, headers=headers) as response:
-                    return response.status == 200
-            except aiohttp.ClientError:
-                return False
+        session = self.main_window.http_client
+        headers = session.auth_headers(self.current_token)
+        try:
+            url = f'https://api.github.com/repos/{self.current_username}/{name}'
+            async with session.get(url, headers=headers) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
 
     def delete_selected_repo(self):
         if not self.selected_repo:
@@ -361,28 +474,29 @@ class RepositoryTab(QtWidgets.QWidget):
         reply = msg_box.exec()
         
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-            asyncio.get_event_loop().call_soon_threadsafe(
-                lambda: asyncio.create_task(self.delete_repos_async([self.selected_repo]))
-            )
+            self.main_window.http_client.submit(self.delete_repos_async([self.selected_repo]))
 
     async def delete_repos_async(self, repo_names):
-        headers = {'Authorization': f'token {self.current_token}'}
-        async with aiohttp.ClientSession() as session:
-            for repo_name in repo_names:
-                try:
-                    url = f'https://api.github.com/repos/{self.current_username}/{repo_name}'
-                    async with session.delete(url, headers=headers) as response:
-                        if response.status == 204:
-                            print(f"Successfully deleted repository: {repo_name}")
-                        else:
-                            print(f"Failed to delete repository: {repo_name}. Status: {response.status}")
-                except aiohttp.ClientError as e:
-                    print(f"Error deleting repository {repo_name}: {str(e)}")
-        
+        session = self.main_window.http_client
+        headers = session.auth_headers(self.current_token)
+        deleted = []
+        for repo_name in repo_names:
+            try:
+                url = f'https://api.github.com/repos/{self.current_username}/{repo_name}'
+                async with session.delete(url, headers=headers) as response:
+                    if response.status == 204:
+                        deleted.append(repo_name)
+                        print(f"Successfully deleted repository: {repo_name}")
+                    else:
+                        print(f"Failed to delete repository: {repo_name}. Status: {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error deleting repository {repo_name}: {str(e)}")
+    
         # 删除选中的库
         self.selected_repo = None
-        # 刷新仓表
-        await self.fetch_all_repos_async(self.current_token)
+        self.selected_record = None
+        # 从缓存的列表中去掉已删除的仓库
+        self.main_window.preloader.record_deleted(self.current_username, deleted)
 
     @QtCore.pyqtSlot(str, str)
     def show_warning_message(self, title, message):
@@ -413,26 +527,26 @@ class RepositoryTab(QtWidgets.QWidget):
             return
 
         self.create_progress_dialog("上传文件", "正在上传文件...")
-        asyncio.get_event_loop().call_soon_threadsafe(
-            lambda: asyncio.create_task(self.upload_files_async(local_path, self.selected_repo))
-        )
+        self.main_window.http_client.submit(self.upload_files_async(local_path, self.selected_record))
 
-    async def upload_files_async(self, local_path, repo_name):
-        headers = {'Authorization': f'token {self.current_token}'}
-        base_url = f'https://api.github.com/repos/{self.current_username}/{repo_name}/contents/'
+    async def upload_files_async(self, local_path, repo):
+        session = self.main_window.http_client
+        headers = session.auth_headers(self.current_token)
+        # 仓库可能属于组织，路径以详情中的 full_name 为准
+        details = await self.main_window.preloader.get_repo_details(self.current_token, repo)
+        base_url = f"https://api.github.com/repos/{details['full_name']}/contents/"
 
         # 获取选择的目录名称
         dir_name = os.path.basename(local_path)
 
-        async with aiohttp.ClientSession() as session:
-            if os.path.isfile(local_path):
-                await self.upload_file(session, headers, base_url, local_path, dir_name)
-            elif os.path.isdir(local_path):
-                await self.upload_directory(session, headers, base_url, local_path, dir_name)
-        
-            if os.path.isdir(local_path) and not os.listdir(local_path):
-                # 如果选择的是个空目录，保创建它
-                await self.create_gitkeep(session, headers, base_url, dir_name)
+        if os.path.isfile(local_path):
+            await self.upload_file(session, headers, base_url, local_path, dir_name)
+        elif os.path.isdir(local_path):
+            await self.upload_directory(session, headers, base_url, local_path, dir_name)
+    
+        if os.path.isdir(local_path) and not os.listdir(local_path):
+            # 如果选择的是个空目录，保创建它
+            await self.create_gitkeep(session, headers, base_url, dir_name)
 
         QtCore.QMetaObject.invokeMethod(self, "close_progress_dialog",
                                         QtCore.Qt.ConnectionType.QueuedConnection)
@@ -547,9 +661,7 @@ class RepositoryTab(QtWidgets.QWidget):
         clone_dir = QtWidgets.QFileDialog.getExistingDirectory(self, "选择克隆目")
         if clone_dir:
             # 执行克隆操作
-            asyncio.get_event_loop().call_soon_threadsafe(
-                lambda: asyncio.create_task(self.clone_repo_async(clone_url, clone_dir))
-            )
+            self.main_window.http_client.submit(self.clone_repo_async(clone_url, clone_dir))
 
     async def clone_repo_async(self, clone_url, clone_dir):
         try:
@@ -562,9 +674,14 @@ class RepositoryTab(QtWidgets.QWidget):
             api_url = f'https://api.github.com/repos/{username}/{repo_name}/zipball'
 
             # 发送请求下载 zip 文件
-            response = requests.get(api_url, headers={'Authorization': f'token {self.current_token}'})
+            async with self.main_window.http_client.get(api_url, token=self.current_token) as response:
+                status = response.status
+                if status == 200:
+                    content = await response.read()
+                else:
+                    error_text = await response.text()
             
-            if response.status_code == 200:
+            if status == 200:
                 # 使用仓库作为目标录
                 repo_dir = os.path.join(clone_dir, repo_name)
                 
@@ -582,7 +699,7 @@ class RepositoryTab(QtWidgets.QWidget):
                 os.makedirs(repo_dir, exist_ok=True)
 
                 # 解压 zip 文件
-                with zipfile.ZipFile(io.BytesIO(response.content)) as zip_ref:
+                with zipfile.ZipFile(io.BytesIO(content)) as zip_ref:
                     zip_ref.extractall(repo_dir)
 
                 # 移动文件到正确的位置
@@ -599,7 +716,7 @@ class RepositoryTab(QtWidgets.QWidget):
                 QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
                                                 QtCore.Qt.ConnectionType.QueuedConnection,
                                                 QtCore.Q_ARG(str, "下载失败"),
-                                                QtCore.Q_ARG(str, f"下载失败: {response.status_code} - {response.text}"))
+                                                QtCore.Q_ARG(str, f"下载失败: {status} - {error_text}"))
         except Exception as e:
             QtCore.QMetaObject.invokeMethod(self, "show_warning_message",
                                             QtCore.Qt.ConnectionType.QueuedConnection,
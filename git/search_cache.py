@@ -0,0 +1,98 @@
+import hashlib
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from . import cache_io
+
+# 搜索结果界面实际用到的字段，其余字段不缓存
+RESULT_FIELDS = (
+    'id', 'name', 'full_name', 'description', 'language', 'stargazers_count', 'watchers_count',
+    'forks_count', 'html_url', 'updated_at'
+)
+
+
+def normalize_query(query):
+    # GitHub 搜索不区分大小写，多余的空白也不影响结果
+    return re.sub(r'\s+', ' ', query.strip()).lower()
+
+
+def project_result(repo):
+    return {field: repo.get(field) for field in RESULT_FIELDS}
+
+
+class SearchCache:
+    # GitHub 搜索结果缓存：内存中的 LRU 在前，磁盘缓存在后，
+    # 同一查询在有效期内重复搜索时不再消耗搜索接口每分钟 30 次的额度
+    def __init__(self, cache_dir, writer=None, ttl=600, max_memory_entries=64, max_disk_entries=500):
+        self.store_dir = os.path.join(cache_dir, 'search')
+        os.makedirs(self.store_dir, exist_ok=True)
+        self.writer = writer or cache_io.CacheWriter()
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.memory = OrderedDict()
+        # 磁盘上的条目按写入时间排序，超出数量上限时先淘汰最早的
+        self.disk_index = OrderedDict()
+        entries = []
+        for name in os.listdir(self.store_dir):
+            if name.endswith(cache_io.EXTENSION):
+                path = os.path.join(self.store_dir, name)
+                entries.append((os.path.getmtime(path), name[:-len(cache_io.EXTENSION)]))
+        for mtime, key in sorted(entries):
+            self.disk_index[key] = mtime
+
+    @staticmethod
+    def make_key(query):
+        return hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.store_dir, f'{key}{cache_io.EXTENSION}')
+
+    def get(self, query):
+        key = self.make_key(query)
+        entry = self.memory.get(key)
+        if entry is None and key in self.disk_index:
+            try:
+                entry, _ = self.writer.read(self.entry_path(key))
+            except (OSError, ValueError, zlib.error):
+                entry = None
+            if entry is None:
+                self.disk_index.pop(key, None)
+            else:
+                self.remember(key, entry)
+        if entry is None:
+            return None
+        if time.time() - entry['timestamp'] > self.ttl:
+            self.discard(key)
+            return None
+        self.memory.move_to_end(key)
+        return entry['results']
+
+    def put(self, query, results):
+        key = self.make_key(query)
+        entry = {
+            'query': normalize_query(query),
+            'timestamp': time.time(),
+            'results': [project_result(repo) for repo in results]
+        }
+        self.remember(key, entry)
+        self.writer.write(self.entry_path(key), entry)
+        self.disk_index.pop(key, None)
+        self.disk_index[key] = entry['timestamp']
+        while len(self.disk_index) > self.max_disk_entries:
+            old_key, _ = self.disk_index.popitem(last=False)
+            self.writer.remove(self.entry_path(old_key))
+        return entry['results']
+
+    def remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def discard(self, key):
+        self.memory.pop(key, None)
+        if self.disk_index.pop(key, None) is not None:
+            self.writer.remove(self.entry_path(key))
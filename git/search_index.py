@@ -0,0 +1,337 @@
+import heapq
+import itertools
+import math
+import re
+import threading
+from array import array
+from collections import OrderedDict
+
+# 搜索选项对应的字段
+SEARCH_FIELDS = {
+    '全部': ('name', 'description', 'language'),
+    '名称': ('name',),
+    '描述': ('description',),
+    '语言': ('language',)
+}
+
+INDEXED_FIELDS = ('name', 'description', 'language')
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# 模糊搜索：容忍拼写错误，按相关度排序，只保留最相关的若干个结果
+FUZZY_OPTION = '模糊'
+FIELD_WEIGHTS = {'name': 3.0, 'language': 2.0, 'description': 1.0}
+# 单词与查询词的匹配程度：完全相同、前缀、包含、拼写错误
+MATCH_QUALITY = (1.0, 0.8, 0.6, 0.4)
+# 短于这个长度的查询词不做拼写纠错，否则候选太多
+MIN_TYPO_LENGTH = 4
+MAX_FUZZY_RESULTS = 200
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def deletions(token):
+    # 删去一个字符得到的所有变体；两个单词有共同的变体时编辑距离不超过 2，
+    # 替换、多一个字符、少一个字符和相邻字符颠倒都能找到
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SearchIndex:
+    # 本地仓库列表的搜索索引，对每个字段保存：
+    #   exact    小写后的完整值 -> 位置列表，用于精确匹配
+    #   tokens   单词 -> 位置数组（倒排索引）
+    #   trigrams 三字符片段 -> 含有该片段的单词，用于在词表中查找子串
+    # 查询中的每一段连续单词字符一定落在文本的某个单词内部，
+    # 所以先找到包含这一段的单词，合并它们的位置作为候选，再逐个确认子串。
+    # 位置就是仓库在列表中的下标，结果按位置排序即可保持原来的顺序
+    def __init__(self, repos=None):
+        self.repos = []
+        self.lowered = {field: [] for field in INDEXED_FIELDS}
+        self.exact = {field: {} for field in INDEXED_FIELDS}
+        self.tokens = {field: {} for field in INDEXED_FIELDS}
+        self.trigrams = {field: {} for field in INDEXED_FIELDS}
+        # 变体 -> 单词，第一次模糊搜索时才建立；建立过程不持有全局锁，
+        # deletes_lock 保证同一个索引只建立一次
+        self.deletes = None
+        self.deletes_lock = threading.Lock()
+        if repos:
+            self.add_all(repos)
+
+    def add_all(self, repos):
+        for repo in repos:
+            self.add(repo)
+
+    def add(self, repo):
+        # 只追加到末尾，分批加载时每到一页增量建立索引
+        position = len(self.repos)
+        self.repos.append(repo)
+        for field in INDEXED_FIELDS:
+            value = repo[field]
+            text = value.lower() if value is not None else None
+            self.lowered[field].append(text)
+            if not text:
+                continue
+            self.exact[field].setdefault(text, []).append(position)
+            tokens = self.tokens[field]
+            for token in set(TOKEN_PATTERN.findall(text)):
+                posting = tokens.get(token)
+                if posting is None:
+                    posting = tokens[token] = array('i')
+                    self.add_token(field, token)
+                posting.append(position)
+
+    def add_token(self, field, token):
+        grams = self.trigrams[field]
+        for gram in trigrams(token):
+            grams.setdefault(gram, []).append(token)
+        if self.deletes is not None:
+            self.add_deletes(self.deletes[field], token)
+
+    @staticmethod
+    def add_deletes(deletes, token):
+        if len(token) < MIN_TYPO_LENGTH:
+            return
+        deletes.setdefault(token, []).append(token)
+        for variant in deletions(token):
+            deletes.setdefault(variant, []).append(token)
+
+    def sync(self, repos):
+        # 列表只在末尾追加过时增量补上新增的部分，否则返回 False 由调用方重建
+        count = len(self.repos)
+        if len(repos) < count or any(repos[i] is not self.repos[i] for i in (0, count - 1) if count):
+            return False
+        self.add_all(repos[count:])
+        return True
+
+    def matching_tokens(self, field, part):
+        if len(part) >= 3:
+            # 取最少见的片段对应的单词，再确认是否包含整段
+            smallest = None
+            for gram in trigrams(part):
+                tokens = self.trigrams[field].get(gram)
+                if tokens is None:
+                    return []
+                if smallest is None or len(tokens) < len(smallest):
+                    smallest = tokens
+            return [token for token in smallest if part in token]
+        return [token for token in self.tokens[field] if part in token]
+
+    def candidates(self, field, text):
+        # 返回可能包含 text 的位置；None 表示需要检查全部位置
+        parts = TOKEN_PATTERN.findall(text)
+        if not parts:
+            return None
+        # 每一段都能单独给出候选，选对应位置最少的一段
+        postings = self.tokens[field]
+        best = None
+        best_size = None
+        for part in set(parts):
+            tokens = self.matching_tokens(field, part)
+            size = sum(len(postings[token]) for token in tokens)
+            if best is None or size < best_size:
+                best, best_size = tokens, size
+        positions = set()
+        for token in best:
+            positions.update(postings[token])
+        return positions
+
+    def search_positions(self, search_text, search_option, within=None):
+        # 返回 (精确匹配的位置, 部分匹配的位置)，两者都已排序且不重复。
+        # within 是上一次查询匹配到的位置：新查询包含上一次的查询时结果只会更少，
+        # 只需在这些位置中继续筛选
+        text = search_text.lower()
+        fields = SEARCH_FIELDS.get(search_option, SEARCH_FIELDS['全部'])
+        exact = set()
+        partial = set()
+        for field in fields:
+            lowered = self.lowered[field]
+            if not text:
+                # 空查询与原来的行为一致：字段有值即算部分匹配
+                partial.update(i for i, value in enumerate(lowered) if value is not None)
+                continue
+            candidates = self.candidates(field, text)
+            if within is not None:
+                exact.update(i for i in self.exact[field].get(text, ()) if i in within)
+                # 从两组候选中较小的一组出发
+                if candidates is None or len(within) <= len(candidates):
+                    candidates = within
+                else:
+                    candidates = [i for i in candidates if i in within]
+            else:
+                exact.update(self.exact[field].get(text, ()))
+            if candidates is None:
+                candidates = range(len(lowered))
+            partial.update(i for i in candidates if lowered[i] is not None and text in lowered[i])
+        partial -= exact
+        return sorted(exact), sorted(partial)
+
+    def query_positions(self, query, search_option, within=None):
+        # query 是 search_widget.compile_query 编译好的结构化查询：
+        # 先用索引字段（如语言）缩小候选范围，再做文本匹配，最后逐个检查其余条件
+        candidates = within
+        for field, value in query.index_terms:
+            positions = self.exact[field].get(value, ())
+            candidates = set(positions) if candidates is None else candidates.intersection(positions)
+        if search_option == FUZZY_OPTION and TOKEN_PATTERN.search(query.text):
+            ranked = self.fuzzy_positions(query.text, candidates, query.matches if query.predicates else None)
+            return ranked, []
+        if query.text or not query.is_structured:
+            exact, partial = self.search_positions(query.text, search_option, candidates)
+        else:
+            exact = []
+            partial = sorted(candidates) if candidates is not None else list(range(len(self.repos)))
+        if query.predicates:
+            repos = self.repos
+            matches = query.matches
+            exact = [i for i in exact if matches(repos[i])]
+            partial = [i for i in partial if matches(repos[i])]
+        return exact, partial
+
+    def typo_tokens(self, field, word):
+        if len(word) < MIN_TYPO_LENGTH:
+            return set()
+        if self.deletes is None:
+            # 通常已由 prepare_fuzzy 在锁外建好，这里只是兜底
+            self.deletes = self.build_deletes({name: list(self.tokens[name]) for name in INDEXED_FIELDS})
+        deletes = self.deletes[field]
+        found = set(deletes.get(word, ()))
+        for variant in deletions(word):
+            found.update(deletes.get(variant, ()))
+        return found
+
+    @classmethod
+    def build_deletes(cls, vocabulary):
+        deletes = {field: {} for field in INDEXED_FIELDS}
+        for field, tokens in vocabulary.items():
+            for token in tokens:
+                cls.add_deletes(deletes[field], token)
+        return deletes
+
+    def prepare_fuzzy(self):
+        # 建立变体表需要几秒，期间不持有全局锁，其他列表的搜索不受影响。
+        # 先在锁内复制词表，锁外建表，再在锁内补上建表期间新增的单词
+        if self.deletes is not None:
+            return
+        with self.deletes_lock:
+            with _lock:
+                if self.deletes is not None:
+                    return
+                vocabulary = {field: list(self.tokens[field]) for field in INDEXED_FIELDS}
+            deletes = self.build_deletes(vocabulary)
+            with _lock:
+                # 单词只会追加，新增的单词排在词表末尾
+                for field in INDEXED_FIELDS:
+                    for token in itertools.islice(self.tokens[field], len(vocabulary[field]), None):
+                        self.add_deletes(deletes[field], token)
+                self.deletes = deletes
+
+    def word_matches(self, field, word):
+        # 词表中与查询词匹配的单词 -> 匹配程度
+        matches = {}
+        for token in self.matching_tokens(field, word):
+            if token == word:
+                matches[token] = MATCH_QUALITY[0]
+            elif token.startswith(word):
+                matches[token] = MATCH_QUALITY[1]
+            else:
+                matches[token] = MATCH_QUALITY[2]
+        for token in self.typo_tokens(field, word):
+            matches.setdefault(token, MATCH_QUALITY[3])
+        return matches
+
+    def fuzzy_positions(self, search_text, within=None, matches=None, limit=MAX_FUZZY_RESULTS):
+        # 每个查询词都要在某个字段中匹配到；得分由字段权重、匹配程度和匹配位置决定，
+        # 再按星标数略微加权。候选只来自词表中匹配到的单词，
+        # 用大小为 limit 的堆保留得分最高的结果，不对全部候选排序
+        words = set(TOKEN_PATTERN.findall(search_text.lower()))
+        total = None
+        for word in words:
+            best = {}
+            for field in INDEXED_FIELDS:
+                weight = FIELD_WEIGHTS[field]
+                postings = self.tokens[field]
+                lowered = self.lowered[field]
+                for token, quality in self.word_matches(field, word).items():
+                    base = weight * quality
+                    for i in postings[token]:
+                        if within is not None and i not in within:
+                            continue
+                        if total is not None and i not in total:
+                            continue
+                        # 越靠前的匹配越相关
+                        score = base / (1 + lowered[i].find(token) / 32)
+                        if score > best.get(i, 0):
+                            best[i] = score
+            if total is None:
+                total = best
+            else:
+                total = {i: score + best[i] for i, score in total.items() if i in best}
+            if not total:
+                return []
+        repos = self.repos
+        heap = []
+        for i, score in total.items():
+            repo = repos[i]
+            if matches is not None and not matches(repo):
+                continue
+            score *= 1 + math.log10(1 + (repo['stargazers_count'] or 0)) / 10
+            # 得分相同时列表中靠前的仓库优先
+            item = (score, -i)
+            if len(heap) < limit:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        return [-i for _, i in sorted(heap, reverse=True)]
+
+    def search(self, search_text, search_option):
+        exact, partial = self.search_positions(search_text, search_option)
+        repos = self.repos
+        return [repos[i] for i in exact] + [repos[i] for i in partial]
+
+
+# 最近用过的几个列表的索引，同一个列表再次搜索时直接复用。
+# 界面线程和搜索线程都会用到，建立和查询索引时需要持有锁
+_indexes = OrderedDict()
+_lock = threading.RLock()
+MAX_CACHED_INDEXES = 4
+
+
+def search(repos, query, search_option, within=None):
+    # query 可以是普通文本或编译好的结构化查询；返回 (结果列表, 匹配位置)，可以在任意线程调用。
+    # 模糊搜索的结果按相关度排序，其余按精确匹配在前、部分匹配在后
+    if search_option == FUZZY_OPTION:
+        # 第一次模糊搜索时在全局锁外建立变体表
+        index_for(repos).prepare_fuzzy()
+    with _lock:
+        index = index_for(repos)
+        if isinstance(query, str):
+            if search_option == FUZZY_OPTION and TOKEN_PATTERN.search(query):
+                exact, partial = index.fuzzy_positions(query, within), []
+            else:
+                exact, partial = index.search_positions(query, search_option, within)
+        else:
+            exact, partial = index.query_positions(query, search_option, within)
+        results = [index.repos[i] for i in exact] + [index.repos[i] for i in partial]
+    return results, set(exact).union(partial)
+
+
+def index_for(repos):
+    with _lock:
+        return _index_for(repos)
+
+
+def _index_for(repos):
+    key = id(repos)
+    entry = _indexes.get(key)
+    # 缓存中保存着列表本身的引用，id 不会被其他列表复用
+    if entry is not None and entry[0] is repos and entry[1].sync(repos):
+        _indexes.move_to_end(key)
+        return entry[1]
+    index = SearchIndex(repos)
+    _indexes[key] = (repos, index)
+    _indexes.move_to_end(key)
+    while len(_indexes) > MAX_CACHED_INDEXES:
+        _indexes.popitem(last=False)
+    return index
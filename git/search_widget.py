@@ -1,5 +1,157 @@
 from PyQt6 import QtWidgets, QtCore
+import calendar
+import functools
+import operator
 import re
+from datetime import datetime
+from . import highlighter, search_index
+
+# 结构化查询，例如 lang:python stars:>500 pushed:<2024-01-01 fork:false cli
+# 限定条件之外的部分作为普通文本，按搜索选项在对应字段中匹配
+QUERY_TERM = re.compile(r'(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+
+COMPARISONS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '>': operator.gt,
+    '<': operator.lt
+}
+
+NUMERIC_QUALIFIERS = {
+    'stars': 'stargazers_count',
+    'forks': 'forks_count'
+}
+
+DATE_QUALIFIERS = {
+    'pushed': 'pushed_ts',
+    'updated': 'updated_ts'
+}
+
+DAY = 86400
+
+
+def parse_number_range(value):
+    # 支持 N、>N、>=N、<N、<=N、N..M、N..*、*..M，返回检查数值的函数
+    if '..' in value:
+        low, high = value.split('..', 1)
+        low = None if low in ('', '*') else int(low)
+        high = None if high in ('', '*') else int(high)
+        return lambda x: x is not None and (low is None or x >= low) and (high is None or x <= high)
+    for symbol, compare in COMPARISONS.items():
+        if value.startswith(symbol):
+            bound = int(value[len(symbol):])
+            return lambda x: x is not None and compare(x, bound)
+    bound = int(value)
+    return lambda x: x == bound
+
+
+def parse_day(value):
+    return calendar.timegm(datetime.strptime(value, '%Y-%m-%d').timetuple())
+
+
+def parse_date_range(value):
+    # 日期按整天计算，与 GitHub 搜索的语义一致；时间在记录中已经是整数秒
+    if '..' in value:
+        low, high = value.split('..', 1)
+        start = None if low in ('', '*') else parse_day(low)
+        end = None if high in ('', '*') else parse_day(high) + DAY
+        return lambda x: x is not None and (start is None or x >= start) and (end is None or x < end)
+    for symbol in COMPARISONS:
+        if value.startswith(symbol):
+            start = parse_day(value[len(symbol):])
+            if symbol == '>':
+                return lambda x: x is not None and x >= start + DAY
+            if symbol == '>=':
+                return lambda x: x is not None and x >= start
+            if symbol == '<':
+                return lambda x: x is not None and x < start
+            return lambda x: x is not None and x < start + DAY
+    start = parse_day(value)
+    return lambda x: x is not None and start <= x < start + DAY
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in ('true', 'yes', 'only'):
+        return True
+    if value in ('false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+class CompiledQuery:
+    # 编译好的查询：text 是普通文本部分，index_terms 是可以直接查索引的 (字段, 值)，
+    # predicates 是对每个候选仓库依次检查的条件
+    def __init__(self, text, index_terms, predicates):
+        self.text = text
+        self.index_terms = tuple(index_terms)
+        self.predicates = tuple(predicates)
+        self.is_structured = bool(self.index_terms or self.predicates)
+
+    def matches(self, repo):
+        for predicate in self.predicates:
+            if not predicate(repo):
+                return False
+        return True
+
+
+def compile_term(key, value, index_terms, predicates):
+    if key in ('lang', 'language'):
+        index_terms.append(('language', value.lower()))
+    elif key in NUMERIC_QUALIFIERS:
+        attribute = NUMERIC_QUALIFIERS[key]
+        test = parse_number_range(value)
+        predicates.append(lambda repo: test(getattr(repo, attribute)))
+    elif key in DATE_QUALIFIERS:
+        attribute = DATE_QUALIFIERS[key]
+        test = parse_date_range(value)
+        predicates.append(lambda repo: test(getattr(repo, attribute)))
+    elif key == 'fork':
+        expected = parse_bool(value)
+        # 布尔条件最便宜，放在最前面
+        predicates.insert(0, lambda repo: repo.fork == expected)
+    elif key in ('user', 'owner'):
+        login = value.lower()
+        predicates.insert(0, lambda repo: (repo.owner_login or '').lower() == login)
+    else:
+        raise ValueError(key)
+
+
+@functools.lru_cache(maxsize=128)
+def compile_query(search_text):
+    # 同一个查询只编译一次；无法识别的限定条件按普通文本处理
+    index_terms = []
+    predicates = []
+    words = []
+    for match in QUERY_TERM.finditer(search_text):
+        key, value, phrase, word = match.groups()
+        if key is not None:
+            try:
+                compile_term(key.lower(), value.strip('"'), index_terms, predicates)
+                continue
+            except ValueError:
+                words.append(match.group(0))
+                continue
+        words.append(phrase if phrase is not None else word)
+    if not index_terms and not predicates:
+        # 没有限定条件时保持原来的整段子串匹配
+        return CompiledQuery(search_text, (), ())
+    return CompiledQuery(' '.join(words), index_terms, predicates)
+
+
+def is_refinement(previous_text, search_text, search_option=None):
+    # 新查询是否只会缩小上一次查询的结果，可以在上一次的结果中继续筛选。
+    # 模糊搜索只保留得分最高的一部分，不能在上一次的结果中继续筛选
+    if not previous_text or search_option == search_index.FUZZY_OPTION:
+        return False
+    if compile_query(previous_text).is_structured or compile_query(search_text).is_structured:
+        return False
+    return previous_text.lower() in search_text.lower()
+
+
+def run_query(repos, search_text, search_option, within=None):
+    return search_index.search(repos, compile_query(search_text), search_option, within)
+
 
 class SearchWidget(QtWidgets.QWidget):
     search_changed = QtCore.pyqtSignal(str, str)  # 只发送搜索文本和搜索选项
@@ -16,7 +168,7 @@ class SearchWidget(QtWidgets.QWidget):
         layout.addWidget(self.search_input)
 
         self.search_options = QtWidgets.QComboBox()
-        self.search_options.addItems(["全部", "名称", "描述", "语言"])
+        self.search_options.addItems(["全部", "名称", "描述", "语言", search_index.FUZZY_OPTION])
         self.search_options.currentTextChanged.connect(self.on_search_changed)
         layout.addWidget(self.search_options)
 
@@ -33,42 +185,9 @@ class SearchWidget(QtWidgets.QWidget):
 
     @staticmethod
     def filter_repos(repos, search_text, search_option):
-        search_text = search_text.lower()
-        exact_matches = set()
-        partial_matches = set()
-        
-        for repo in repos:
-            if search_option == "名称" or search_option == "全部":
-                if SearchWidget.exact_match(search_text, repo['name']):
-                    exact_matches.add(repo['id'])
-                elif SearchWidget.partial_match(search_text, repo['name']):
-                    partial_matches.add(repo['id'])
-            
-            if search_option == "描述" or search_option == "全部":
-                if SearchWidget.exact_match(search_text, repo['description']):
-                    exact_matches.add(repo['id'])
-                elif SearchWidget.partial_match(search_text, repo['description']):
-                    partial_matches.add(repo['id'])
-            
-            if search_option == "语言" or search_option == "全部":
-                if SearchWidget.exact_match(search_text, repo['language']):
-                    exact_matches.add(repo['id'])
-                elif SearchWidget.partial_match(search_text, repo['language']):
-                    partial_matches.add(repo['id'])
-
-        # 移除在精确匹配中已经存在的部分匹配
-        partial_matches -= exact_matches
-
-        # 构建结果列表
-        results = []
-        for repo in repos:
-            if repo['id'] in exact_matches:
-                results.append(repo)
-        for repo in repos:
-            if repo['id'] in partial_matches:
-                results.append(repo)
-
-        return results
+        # 通过索引查找，精确匹配在前、部分匹配在后，各自保持列表原有顺序；
+        # 模糊搜索按相关度排序
+        return run_query(repos, search_text, search_option)[0]
 
     @staticmethod
     def exact_match(search_text, target_text):
@@ -84,12 +203,4 @@ class SearchWidget(QtWidgets.QWidget):
 
     @staticmethod
     def highlight_text(text, search_text):
-        if not text or not search_text:
-            return text
-        
-        def replace_func(match):
-            return f'<span style="background-color: yellow; color: black;">{match.group()}</span>'
-        
-        pattern = re.compile(re.escape(search_text), re.IGNORECASE)
-        highlighted_text = pattern.sub(replace_func, text)
-        return f'<span style="color: black;">{highlighted_text}</span>'
+        return highlighter.highlight_text(text, search_text)
@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6 import QtCore
+from .search_widget import run_query
+
+
+class SearchWorker(QtCore.QObject):
+    # 在后台线程中过滤本地仓库列表，界面线程只负责根据结果重建控件。
+    # 每次提交新查询都会取消上一个查询，过时的结果不会发回界面
+    results_ready = QtCore.pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.future = None
+
+    def submit(self, repos, search_text, search_option, within=None):
+        # 返回这次查询的编号，results_ready 发出 (编号, (结果列表, 匹配位置))
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            if self.future is not None:
+                # 还没开始执行的查询直接取消，正在执行的查询完成后会被丢弃
+                self.future.cancel()
+            self.future = self.executor.submit(self.run, generation, repos, search_text, search_option, within)
+        return generation
+
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            if self.future is not None:
+                self.future.cancel()
+                self.future = None
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def run(self, generation, repos, search_text, search_option, within):
+        if not self.is_current(generation):
+            return
+        try:
+            result = run_query(repos, search_text, search_option, within)
+        except Exception as e:
+            print(f"搜索 {search_text} 时发生错误: {str(e)}")
+            return
+        if self.is_current(generation):
+            # 跨线程发出的信号会排队到界面线程中处理
+            self.results_ready.emit(generation, result)
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -1,7 +1,8 @@
 from PyQt6 import QtWidgets, QtCore
 import aiohttp
 import asyncio
-from .search_widget import SearchWidget
+from .search_widget import SearchWidget, is_refinement
+from .search_worker import SearchWorker
 import json
 import os
 from datetime import datetime, timedelta
@@ -12,7 +13,22 @@ class StarredTab(QtWidgets.QWidget):
         self.main_window = main_window
         self.starred_repos = []
         self.filtered_repos = []
+        # 输入停顿一段时间（毫秒）后才过滤，连续输入只重建一次列表
+        self.filter_delay = 200
+        self.filter_timer = QtCore.QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.apply_pending_filter)
+        self.pending_filter = None
+        self.filter_generation = 0
+        # 上一次过滤的 (列表, 查询, 选项, 匹配位置, 当时的列表长度)，用于在其结果上继续筛选
+        self.last_filter = None
+        # 过滤在后台线程中进行；filter_request 是还在等待结果的查询
+        self.search_worker = SearchWorker(self)
+        self.search_worker.results_ready.connect(self.on_filter_results)
+        self.filter_request = None
         self.init_ui()
+        self.main_window.preloader.starred_batch_loaded.connect(self.on_starred_batch_loaded)
+        self.main_window.preloader.starred_repos_loaded.connect(self.on_refresh_completed)
         self.load_cached_repos()
 
     def init_ui(self):
@@ -20,7 +36,7 @@ class StarredTab(QtWidgets.QWidget):
 
         # 添加搜索组件
         self.search_widget = SearchWidget()
-        self.search_widget.search_changed.connect(self.filter_repos)
+        self.search_widget.search_changed.connect(self.schedule_filter)
         self.search_widget.search_input.returnPressed.connect(self.perform_search)  # 添加回车键触发搜索
         layout.addWidget(self.search_widget)
 
@@ -54,27 +70,67 @@ class StarredTab(QtWidgets.QWidget):
         layout.addWidget(self.scroll_area)
 
     def perform_search(self):
+        # 回车或列表更新时立即过滤，不再等待
+        self.filter_timer.stop()
+        self.pending_filter = None
         search_text = self.search_widget.search_input.text()
         search_option = self.search_widget.search_options.currentText()
         self.filter_repos(search_text, search_option)
 
+    def schedule_filter(self, search_text, search_option):
+        # 每次输入只记下最新的查询并重新计时，中间的查询不会被执行
+        self.filter_generation += 1
+        self.pending_filter = (self.filter_generation, search_text, search_option)
+        self.filter_timer.start(self.filter_delay)
+
+    def apply_pending_filter(self):
+        if self.pending_filter is None:
+            return
+        generation, search_text, search_option = self.pending_filter
+        self.pending_filter = None
+        if generation != self.filter_generation:
+            # 计时期间又有新的输入，这个结果已经过时
+            return
+        self.filter_repos(search_text, search_option)
+
     def refresh_starred_repos(self):
-        if self.main_window.token_tab.current_token:
+        if self.main_window.token_tab.current_token and self.main_window.token_tab.current_username:
             username = self.main_window.token_tab.current_username
-            self.main_window.preloader.clear_starred_cache(username)  # 只清除星标仓库缓存
-            self.main_window.preloader.starred_repos_loaded.connect(self.on_refresh_completed)
-            self.main_window.preloader.start_preload(self.main_window.token_tab.current_token, username)
+            self.main_window.preloader.start_preload(self.main_window.token_tab.current_token, username, force=True)
             self.main_window.log_message("开始刷新星标仓库列表")
         else:
             QtWidgets.QMessageBox.warning(self, "错误", "请先登录")
             self.main_window.log_message("尝试刷新星标仓库列表失败：未登录")
 
     def on_refresh_completed(self, repos):
+        # 分批推送后界面通常已经是最新的，只有内容不同时才重建
+        unchanged = self.starred_repos == repos
         self.starred_repos = repos
-        self.filtered_repos = self.starred_repos
-        self.update_starred_list()
+        if self.search_widget.search_input.text():
+            self.perform_search()
+        elif not unchanged:
+            self.filtered_repos = self.starred_repos
+            self.update_starred_list()
         self.main_window.log_message(f"刷新完成，获取到 {len(self.starred_repos)} 个星标仓库")
-        self.main_window.preloader.starred_repos_loaded.disconnect(self.on_refresh_completed)
+
+    @QtCore.pyqtSlot(list, bool)
+    def on_starred_batch_loaded(self, batch, first):
+        # 还没有缓存的列表时，完整加载每到一页就追加显示，不必等整个列表；
+        # 已有列表时预加载器不分批推送，只通过加载完成的信号应用最终结果
+        if first:
+            self.starred_repos = []
+        self.starred_repos.extend(batch)
+        if self.search_widget.search_input.text():
+            # 有搜索条件时等整个列表加载完再统一过滤
+            return
+        self.filtered_repos = self.starred_repos
+        if first:
+            self.update_starred_list()
+        else:
+            for repo in batch:
+                repo_widget = self.create_repo_widget(repo)
+                self.repo_layout.insertWidget(self.repo_layout.count() - 1, repo_widget)
+            self.search_widget.set_result_count(len(self.filtered_repos))
 
     def load_cached_repos(self):
         if hasattr(self.main_window, 'token_tab') and self.main_window.token_tab.current_username:
@@ -153,5 +209,28 @@ class StarredTab(QtWidgets.QWidget):
         return widget
 
     def filter_repos(self, search_text, search_option):
-        self.filtered_repos = SearchWidget.filter_repos(self.starred_repos, search_text, search_option)
+        within = None
+        last = self.last_filter
+        if (last is not None and last[0] is self.starred_repos and last[2] == search_option
+                and last[4] == len(self.starred_repos) and is_refinement(last[1], search_text, search_option)):
+            # 新查询包含上一次的查询，只在上一次的结果中继续筛选
+            within = last[3]
+        generation = self.search_worker.submit(self.starred_repos, search_text, search_option, within)
+        self.filter_request = (generation, self.starred_repos, search_text, search_option, len(self.starred_repos))
+
+    @QtCore.pyqtSlot(int, object)
+    def on_filter_results(self, generation, result):
+        request = self.filter_request
+        if request is None or request[0] != generation:
+            # 已经有更新的查询，丢弃这个结果
+            return
+        self.filter_request = None
+        filtered, positions = result
+        _, repos, search_text, search_option, count = request
+        self.last_filter = (repos, search_text, search_option, positions, count)
+        if len(filtered) == len(self.filtered_repos) and all(
+                a is b for a, b in zip(filtered, self.filtered_repos)):
+            # 结果没有变化时不重建控件
+            return
+        self.filtered_repos = filtered
         self.update_starred_list()
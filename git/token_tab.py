@@ -140,6 +140,8 @@ class TokenTab(QtWidgets.QWidget):
                                                  QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No)
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
             index = self.token_list.row(item)
+            # 删除的 token 不再使用，丢掉客户端中为它缓存的请求头
+            self.main_window.http_client.forget_token(self.tokens[index])
             del self.tokens[index]
             self.update_token_list()
             self.save_tokens()
@@ -151,8 +153,12 @@ class TokenTab(QtWidgets.QWidget):
 
     def select_token(self, item):
         index = self.token_list.row(item)
+        if self.tokens[index] != self.current_token:
+            # 切换账号：停止旧账号的预加载，登录成功前不再使用旧的用户名
+            self.main_window.preloader.cancel_preload()
+            self.current_username = None
         self.current_token = self.tokens[index]
-        self.token_updated.emit(self.current_token)
+        # 登录成功后 update_login_status 会发出 token_updated
         self.login_requested.emit(self.current_token)  # 发射信号而不是直接调用异步方法
 
     def update_token_list(self):
@@ -165,33 +171,33 @@ class TokenTab(QtWidgets.QWidget):
     @QtCore.pyqtSlot(str)
     def login_async(self, token):
         print(f"login_async called with token: {token[:4]}...{token[-4:]}")  # 添加这行日志
-        asyncio.get_event_loop().call_soon_threadsafe(
-            lambda: asyncio.create_task(self.try_login_async(token))
-        )
+        self.main_window.http_client.submit(self.try_login_async(token))
 
     async def try_login_async(self, token):
-        headers = {'Authorization': f'token {token}'}
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get('https://api.github.com/user', headers=headers, timeout=10) as response:
-                    if response.status == 200:
-                        user_data = await response.json()
-                        username = user_data.get('login', 'Unknown')
-                        self.current_username = username  # 添加这行
-                        QtCore.QMetaObject.invokeMethod(self, "update_login_status", 
-                                                        QtCore.Qt.ConnectionType.QueuedConnection,
-                                                        QtCore.Q_ARG(str, username), 
-                                                        QtCore.Q_ARG(bool, True))
-                    else:
-                        QtCore.QMetaObject.invokeMethod(self, "update_login_status", 
-                                                        QtCore.Qt.ConnectionType.QueuedConnection,
-                                                        QtCore.Q_ARG(str, ""), 
-                                                        QtCore.Q_ARG(bool, False))
-            except aiohttp.ClientError as e:
+        client = self.main_window.http_client
+        validator_store = self.main_window.preloader.validator_store
+        try:
+            response = await validator_store.get_json(client, 'https://api.github.com/user',
+                                                      client.auth_headers(token),
+                                                      timeout=aiohttp.ClientTimeout(total=10))
+            if response.ok:
+                user_data = response.data
+                username = user_data.get('login', 'Unknown')
+                self.current_username = username  # 添加这行
+                QtCore.QMetaObject.invokeMethod(self, "update_login_status", 
+                                                QtCore.Qt.ConnectionType.QueuedConnection,
+                                                QtCore.Q_ARG(str, username), 
+                                                QtCore.Q_ARG(bool, True))
+            else:
                 QtCore.QMetaObject.invokeMethod(self, "update_login_status", 
                                                 QtCore.Qt.ConnectionType.QueuedConnection,
                                                 QtCore.Q_ARG(str, ""), 
                                                 QtCore.Q_ARG(bool, False))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            QtCore.QMetaObject.invokeMethod(self, "update_login_status", 
+                                            QtCore.Qt.ConnectionType.QueuedConnection,
+                                            QtCore.Q_ARG(str, ""), 
+                                            QtCore.Q_ARG(bool, False))
 
     @QtCore.pyqtSlot(str, bool)
     def update_login_status(self, username, success):
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import zlib
+from collections import OrderedDict
+from . import cache_io
+
+
+class ConditionalResponse:
+    def __init__(self, status, data=None, link=None, not_modified=False):
+        self.status = status
+        self.data = data
+        self.link = link
+        self.not_modified = not_modified
+
+    @property
+    def ok(self):
+        return self.status == 200 or self.not_modified
+
+
+class ValidatorStore:
+    # 按 URL（含页码）和认证信息保存 ETag/Last-Modified 以及对应的响应内容，
+    # 服务器返回 304 时直接复用保存的页面。
+    # 内存中只保留最近用到的条目，磁盘上的条目超过上限时先淘汰最早写入的
+    def __init__(self, cache_dir, writer=None, max_memory_entries=64, max_disk_entries=1000):
+        self.store_dir = os.path.join(cache_dir, 'http')
+        os.makedirs(self.store_dir, exist_ok=True)
+        # 条目在写入线程中压缩落盘，不阻塞事件循环
+        self.writer = writer or cache_io.CacheWriter()
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.disk_index = OrderedDict()
+        entries = []
+        for name in os.listdir(self.store_dir):
+            if name.endswith(cache_io.EXTENSION):
+                path = os.path.join(self.store_dir, name)
+                entries.append((os.path.getmtime(path), name[:-len(cache_io.EXTENSION)]))
+        for mtime, key in sorted(entries):
+            self.disk_index[key] = mtime
+
+    @staticmethod
+    def make_key(url, headers):
+        # 不同 token 访问同一个 /user/... 地址得到的是不同账号的数据
+        auth = (headers or {}).get('Authorization', '')
+        return hashlib.sha1(f'{auth}\n{url}'.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.store_dir, f'{key}{cache_io.EXTENSION}')
+
+    def legacy_entry_path(self, key):
+        return os.path.join(self.store_dir, f'{key}.json')
+
+    def load(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        path = self.entry_path(key)
+        legacy_path = self.legacy_entry_path(key)
+        if not self.writer.exists(path):
+            if not os.path.exists(legacy_path):
+                return None
+            path = legacy_path
+        try:
+            entry, legacy = self.writer.read(path)
+        except (OSError, ValueError, zlib.error):
+            return None
+        self.remember(key, entry)
+        if legacy:
+            # 旧版的 JSON 条目第一次读到时转存为新格式
+            self.save(key, entry)
+            self.writer.remove(legacy_path)
+        return entry
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_memory_entries:
+            self.entries.popitem(last=False)
+
+    def save(self, key, entry):
+        self.remember(key, entry)
+        self.writer.write(self.entry_path(key), entry)
+        self.disk_index.pop(key, None)
+        self.disk_index[key] = True
+        while len(self.disk_index) > self.max_disk_entries:
+            old_key, _ = self.disk_index.popitem(last=False)
+            self.entries.pop(old_key, None)
+            self.writer.remove(self.entry_path(old_key))
+
+    async def get_json(self, session, url, headers=None, project=None, **kwargs):
+        # project 把响应内容精简为调用方实际用到的部分，保存和返回的都是精简后的内容
+        headers = dict(headers or {})
+        key = self.make_key(url, headers)
+        entry = self.load(key)
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        async with session.get(url, headers=headers, **kwargs) as response:
+            if response.status == 304 and entry:
+                return ConditionalResponse(304, entry['body'], entry.get('link'), not_modified=True)
+            if response.status != 200:
+                return ConditionalResponse(response.status)
+
+            body = await response.json()
+            if project is not None:
+                body = project(body)
+            link = response.headers.get('Link')
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.save(key, {
+                    'url': url,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'link': link,
+                    'body': body
+                })
+            return ConditionalResponse(200, body, link)
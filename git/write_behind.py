@@ -0,0 +1,112 @@
+import threading
+
+
+class WriteBehind:
+    # 预加载、新建和删除仓库产生的缓存修改先记在内存中，
+    # 按 (账号, 列表类型) 合并后每隔一段时间统一写入数据库，退出时再写一次。
+    # 同一个列表在一个周期内多次修改时只写一次
+    def __init__(self, store, writer, loop, snapshot, interval=5):
+        self.store = store
+        self.writer = writer
+        self.loop = loop
+        # snapshot(account, kind) 返回内存中该列表的当前内容，多次修改无法直接合并时整体写入
+        self.snapshot = snapshot
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = {}
+        # 已经交给写入线程但还没写完的修改：(账号, 列表类型) -> (修改, future)
+        self.writing = {}
+        self.timer = None
+
+    def replace(self, account, kind, repos):
+        self.record(account, kind, ('replace', list(repos)))
+
+    def upsert_front(self, account, kind, changed, count):
+        self.record(account, kind, ('upsert', list(changed), count))
+
+    def remove(self, account, kind, repo_ids, count):
+        self.record(account, kind, ('remove', list(repo_ids), count))
+
+    def clear(self, account, kind):
+        self.record(account, kind, ('clear',))
+
+    def record(self, account, kind, op):
+        key = (account, kind)
+        with self.lock:
+            previous = self.pending.get(key)
+            self.pending[key] = op if previous is None else self.merge(key, previous, op)
+        self.schedule()
+
+    def merge(self, key, previous, op):
+        if op[0] in ('replace', 'clear'):
+            return op
+        if previous[0] == 'upsert' and op[0] == 'upsert':
+            # 后一次变化的仓库排在最前面，其次是前一次变化中没有再变的仓库
+            ids = {repo.id for repo in op[1]}
+            return ('upsert', op[1] + [repo for repo in previous[1] if repo.id not in ids], op[2])
+        if previous[0] == 'remove' and op[0] == 'remove':
+            return ('remove', previous[1] + op[1], op[2])
+        # 其他组合直接写入内存中的完整列表
+        repos = self.snapshot(*key)
+        if repos is None:
+            return op
+        return ('replace', list(repos))
+
+    def schedule(self):
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = self.loop.call_later(self.interval, self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self.flush()
+
+    def latest(self, account, kind):
+        # 该列表最近一次还没写入数据库的修改，没有时返回 None；
+        # 读取方据此直接使用内存中的内容，不必等待写入线程
+        key = (account, kind)
+        with self.lock:
+            op = self.pending.get(key)
+            if op is None and key in self.writing:
+                op = self.writing[key][0]
+        return op
+
+    def wait_written(self, account, kind):
+        # 把修改交给写入线程并等待这个列表写完；只在无法从内存得到最新内容时使用
+        self.flush()
+        with self.lock:
+            entry = self.writing.get((account, kind))
+        if entry is not None:
+            entry[1].result()
+
+    def flush(self):
+        # 交给写入线程按顺序执行；可以在任意线程调用
+        submitted = []
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for (account, kind), op in pending.items():
+                if op[0] == 'replace':
+                    future = self.writer.call(self.store.replace, account, kind, op[1])
+                elif op[0] == 'upsert':
+                    future = self.writer.call(self.store.upsert_front, account, kind, op[1], op[2])
+                elif op[0] == 'remove':
+                    future = self.writer.call(self.store.remove, account, kind, op[1], op[2])
+                else:
+                    future = self.writer.call(self.store.clear, account, kind)
+                self.writing[(account, kind)] = (op, future)
+                submitted.append(((account, kind), future))
+        # 回调可能立即在当前线程执行，需要在释放锁之后注册
+        for key, future in submitted:
+            future.add_done_callback(lambda f, key=key: self.on_written(key, f))
+        if pending:
+            print(f"写入 {len(pending)} 个列表的缓存修改")
+
+    def on_written(self, key, future):
+        with self.lock:
+            entry = self.writing.get(key)
+            if entry is not None and entry[1] is future:
+                del self.writing[key]